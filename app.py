@@ -1,22 +1,21 @@
-from embeddings.embedder import HuggingFaceEmbedder
-import chromadb
+from embeddings.factory import make_embedder
+from index.factory import open_index
 
 from pipeline.engine import RAGEngine
-from retrieval.retriever import StandardRetriever
+from retrieval.factory import make_retriever
 from generation.llm_wrapper import Llama32Local
-from config import CHROMA_DIR, EMBED_MODEL_NAME
+from config import EMBED_MODEL_NAME
 
 if __name__ == "__main__":
     print("--- Initializing RAG Components ---")
     
     # 1. Setup Models & DB (Infrastructure)
-    embed_model = HuggingFaceEmbedder(model_name=EMBED_MODEL_NAME)
-    chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-    collection = chroma_client.get_collection("notes")
+    embed_model = make_embedder(model_name=EMBED_MODEL_NAME)
+    index = open_index("notes")
     
     # 2. Instantiate Concrete Strategies
     print("Building Retriever...")
-    retriever = StandardRetriever(collection, embed_model)
+    retriever = make_retriever(index, embed_model)
     
     print("Building Generator (LLM)...")
     generator = Llama32Local()
@@ -0,0 +1,127 @@
+# benchmarks/bench_embedders.py
+"""
+Parity check + benchmark: fp32 SentenceTransformer vs int8 ONNX Runtime embedder.
+
+Run from the repo root:
+  python -m benchmarks.bench_embedders
+
+Parity: cosine(torch vector, onnx vector) per text, and top-k overlap of a
+small retrieval over the sample texts. Exits non-zero if parity is below
+--min-cosine. Benchmark: single-query latency (p50/p95), batch throughput,
+and peak resident memory of a fresh process per backend.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from config import EMBED_MODEL_NAME
+
+SAMPLE_TEXTS = [
+    "What are the different types of Organizational Behaviour models?",
+    "Explain motivation theories.",
+    "Tell me about magpie sensing and their solution.",
+    "Organizational behaviour studies how people act within organizations.",
+    "The autocratic model depends on power and managers have authority to command.",
+    "Maslow's hierarchy of needs orders human needs from physiological to self-actualization.",
+    "Social media analytics measures engagement, reach and sentiment across platforms.",
+    "Data science is the process of extracting knowledge from data.",
+    "A data warehouse stores structured data that has been cleaned for reporting.",
+    "Herzberg separated hygiene factors from motivators.",
+    "Web analytics tracks visits, bounce rate and conversions.",
+    "The custodial model relies on economic resources and benefits.",
+]
+
+
+def load_backend(name: str):
+    from embeddings.factory import make_embedder
+    emb = make_embedder(backend=name, model_name=EMBED_MODEL_NAME)
+    emb.cache = None  # measure the model, not the cache
+    return emb
+
+
+def latency(emb, texts: List[str], rounds: int):
+    emb.embed(texts[:1])  # warm-up
+    single = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        emb.embed([texts[i % len(texts)]])
+        single.append((time.perf_counter() - t0) * 1000)
+
+    batch = texts * max(1, 256 // len(texts))
+    t0 = time.perf_counter()
+    emb.embed(batch)
+    throughput = len(batch) / (time.perf_counter() - t0)
+    return float(np.percentile(single, 50)), float(np.percentile(single, 95)), throughput
+
+
+def rss_child(backend: str):
+    """Runs in a fresh process: load backend, embed once, print peak RSS (MB)."""
+    emb = load_backend(backend)
+    emb.embed(SAMPLE_TEXTS)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(json.dumps({"backend": backend, "peak_rss_mb": peak_kb / 1024}))
+
+
+def peak_rss(backend: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_embedders", "--rss-child", backend],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])["peak_rss_mb"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--rss-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.rss_child:
+        rss_child(args.rss_child)
+        return
+
+    ref = load_backend("torch")
+    q8 = load_backend("onnx-int8")
+
+    # ── parity ─────────────────────────────────────────────────────
+    a = ref.embed(SAMPLE_TEXTS)
+    b = q8.embed(SAMPLE_TEXTS)
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    cos = np.einsum("ij,ij->i", a, b)
+
+    k = 3
+    queries, docs = slice(0, 3), slice(3, None)
+    top_a = np.argsort(-(a[queries] @ a[docs].T), axis=1)[:, :k]
+    top_b = np.argsort(-(b[queries] @ b[docs].T), axis=1)[:, :k]
+    overlap = np.mean([len(set(x) & set(y)) / k for x, y in zip(top_a, top_b)])
+
+    print(f"Parity vs {EMBED_MODEL_NAME}:")
+    print(f"  cosine mean {cos.mean():.4f}  min {cos.min():.4f}")
+    print(f"  top-{k} overlap {overlap:.2f}")
+
+    # ── speed / memory ─────────────────────────────────────────────
+    for name, emb in (("torch", ref), ("onnx-int8", q8)):
+        p50, p95, tput = latency(emb, SAMPLE_TEXTS, args.rounds)
+        print(
+            f"{name:>10}: single query p50 {p50:.2f} ms, p95 {p95:.2f} ms; "
+            f"batch {tput:.0f} texts/s; peak RSS {peak_rss(name):.0f} MB"
+        )
+
+    if cos.min() < args.min_cosine:
+        print(f"PARITY FAILED: min cosine {cos.min():.4f} < {args.min_cosine}")
+        sys.exit(1)
+    print("Parity OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_generation.py
+"""
+Aggregate generation throughput under concurrent load, per batch size.
+
+Run from the repo root (needs the GPU / LLM):
+  python -m benchmarks.bench_generation --batch-sizes 1 2 4 8 --requests 16
+
+For each batch size, `--requests` threads call BatchingGenerator.generate at
+once (as concurrent /query requests would); reports wall time, mean batch
+actually formed, and generated tokens/s. With batch size 1 this is the old
+one-prompt-at-a-time behaviour.
+"""
+import argparse
+import threading
+import time
+
+from generation.batching import BatchingGenerator
+from generation.llm_wrapper import Llama32Local
+
+PROMPTS = [
+    "Explain the autocratic model of organizational behaviour in two sentences.",
+    "What is Maslow's hierarchy of needs?",
+    "List three web analytics metrics and what they measure.",
+    "What is the difference between a data warehouse and a data lake?",
+    "Summarize Herzberg's two-factor theory.",
+    "What does the custodial model rely on?",
+    "Define data science in one paragraph.",
+    "How is engagement measured in social media analytics?",
+]
+
+
+def run(llm: Llama32Local, batch_size: int, n_requests: int, max_new_tokens: int):
+    gen = BatchingGenerator(llm, max_batch=batch_size)
+    outputs = [None] * n_requests
+
+    def call(i):
+        outputs[i] = gen.generate(PROMPTS[i % len(PROMPTS)], max_new_tokens=max_new_tokens)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n_requests)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    tokens = sum(len(llm.tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+    return elapsed, tokens, gen.stats()["mean_batch"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    args = parser.parse_args()
+
+    llm = Llama32Local()
+    llm.generate(PROMPTS[0], max_new_tokens=8)  # warm-up
+
+    for b in args.batch_sizes:
+        elapsed, tokens, mean_batch = run(llm, b, args.requests, args.max_new_tokens)
+        print(
+            f"batch {b:>2}: {args.requests} requests in {elapsed:.1f} s, "
+            f"mean batch {mean_batch:.1f}, {tokens / elapsed:.1f} tokens/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
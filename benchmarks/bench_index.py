@@ -0,0 +1,134 @@
+# benchmarks/bench_index.py
+"""
+FlatIndex vs QuantizedFlatIndex vs ChromaIndex on synthetic unit vectors.
+
+Run from the repo root:
+  python -m benchmarks.bench_index --sizes 10000 100000 1000000
+
+For each size: build time, open (cold start) time, single-query p50/p95
+latency and recall@k of the approximate indexes (int8 / binary two-stage
+search, Chroma HNSW) against FlatIndex's exact results.
+Indexes are written to a temporary directory and removed afterwards.
+Use --skip-chroma for the largest sizes if Chroma ingestion is too slow.
+--shards N adds a ShardedIndex over N FlatIndex shards (parallel scatter-gather).
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from index.flat import FlatIndex
+from index.quantized import QuantizedFlatIndex
+from index.sharded import ShardedIndex
+
+DIM = 384  # all-MiniLM-L6-v2
+
+
+def unit_vectors(n: int, dim: int, seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def fill(index, n: int, batch: int = 5_000):
+    for start in range(0, n, batch):
+        end = min(start + batch, n)
+        vecs = unit_vectors(end - start, DIM, seed=start)
+        index.add(
+            documents=[f"doc {i}" for i in range(start, end)],
+            embeddings=vecs,
+            metadatas=[{"row": i} for i in range(start, end)],
+            ids=[f"id{i}" for i in range(start, end)],
+        )
+
+
+def timed_queries(index, queries: np.ndarray, k: int):
+    lat, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append([item["id"] for item in index.query(q, k)])
+        lat.append((time.perf_counter() - t0) * 1000)
+    return np.percentile(lat, 50), np.percentile(lat, 95), results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--rescore-k", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=0)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    queries = unit_vectors(args.queries, DIM, seed=10**9)
+
+    for n in args.sizes:
+        tmp = Path(tempfile.mkdtemp(prefix="bench_index_"))
+        try:
+            print(f"\n── {n:,} vectors (dim {DIM}) ──")
+
+            t0 = time.perf_counter()
+            fill(FlatIndex("bench", root=tmp / "flat", dtype=args.dtype), n)
+            build = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            flat = FlatIndex("bench", root=tmp / "flat", dtype=args.dtype)
+            flat.query(queries[0], args.k)  # first query maps the files
+            open_ms = (time.perf_counter() - t0) * 1000
+            p50, p95, exact = timed_queries(flat, queries, args.k)
+            print(f"  flat ({args.dtype}): build {build:.1f}s, open+first query {open_ms:.1f} ms, "
+                  f"query p50 {p50:.2f} ms, p95 {p95:.2f} ms (exact)")
+
+            for mode in ("int8", "binary"):
+                t0 = time.perf_counter()
+                quant = QuantizedFlatIndex("bench", root=tmp / "flat", dtype=args.dtype,
+                                           mode=mode, rescore_k=args.rescore_k)  # builds codes on first open
+                quant.query(queries[0], args.k)
+                open_ms = (time.perf_counter() - t0) * 1000
+                p50, p95, approx = timed_queries(quant, queries, args.k)
+                recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+                print(f"  {mode}: codes+open+first query {open_ms:.1f} ms, query p50 {p50:.2f} ms, "
+                      f"p95 {p95:.2f} ms, recall@{args.k} {recall:.3f}")
+                print(f"    {quant.memory_report()}")
+
+            if args.shards > 1:
+                def sharded():
+                    return ShardedIndex([
+                        FlatIndex(f"bench_shard{i}", root=tmp / "sharded", dtype=args.dtype)
+                        for i in range(args.shards)
+                    ])
+                t0 = time.perf_counter()
+                fill(sharded(), n)
+                build = time.perf_counter() - t0
+                p50, p95, approx = timed_queries(sharded(), queries, args.k)
+                recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+                print(f"  flat x {args.shards} shards: build {build:.1f}s, query p50 {p50:.2f} ms, "
+                      f"p95 {p95:.2f} ms, recall@{args.k} {recall:.3f}")
+
+            if args.skip_chroma:
+                continue
+
+            from index.storage import ChromaIndex
+
+            t0 = time.perf_counter()
+            fill(ChromaIndex("bench", persist_dir=tmp / "chroma"), n)
+            build = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            chroma = ChromaIndex("bench", persist_dir=tmp / "chroma")
+            chroma.query(queries[0], args.k)
+            open_ms = (time.perf_counter() - t0) * 1000
+            p50, p95, approx = timed_queries(chroma, queries, args.k)
+            recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(approx, exact)])
+            print(f"  chroma: build {build:.1f}s, open+first query {open_ms:.1f} ms, "
+                  f"query p50 {p50:.2f} ms, p95 {p95:.2f} ms, recall@{args.k} {recall:.3f}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,117 @@ BASE_DIR = Path(__file__).resolve().parent
 # Data paths
 RAW_DIR = BASE_DIR / "data" / "raw"
 CHROMA_DIR = BASE_DIR / "data" / "chroma"
+# Tracks which raw files (and which chunk IDs) are in the index, for incremental builds
+MANIFEST_PATH = BASE_DIR / "data" / "index_manifest.json"
+# Per-collection version, bumped by build_index; caches of answers check it
+INDEX_VERSION_PATH = BASE_DIR / "data" / "index_version.json"
+
+# Vector index backend: "chroma" (ChromaIndex), "flat" (memory-mapped FlatIndex),
+# or "flat-int8" / "flat-binary" (QuantizedFlatIndex)
+INDEX_BACKEND = "chroma"
+FLAT_INDEX_DIR = BASE_DIR / "data" / "flat"
+FLAT_INDEX_DTYPE = "float32"  # or "float16" to halve vector memory
+# >1 splits the collection into "<name>_shard<i>" indexes queried in parallel (ShardedIndex)
+INDEX_SHARDS = 1
+QUANT_RESCORE_K = 200  # "flat-int8"/"flat-binary": coarse candidates re-scored exactly
+# Parsed DocUnits per raw file, so re-chunking experiments skip PDF/DOCX/PPTX parsing
+PARSE_CACHE_DIR = BASE_DIR / "data" / "cache" / "units"
 
 # Embedding model (for semantic chunking + retrieval)
 EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Embedding backend: "torch" (fp32 SentenceTransformer) or "onnx-int8" (quantized, CPU)
+EMBED_BACKEND = "torch"
+ONNX_MODEL_DIR = BASE_DIR / "data" / "models" / "onnx-int8"  # one subdirectory per EMBED_MODEL_NAME
+ONNX_NUM_THREADS = 0  # 0 => let ONNX Runtime decide
+# Sentences/chunks per forward pass when embedding in bulk (ingest)
+EMBED_BATCH_SIZE = 256
+# Embedding cache: in-memory LRU + on-disk store keyed by model name and text hash
+EMBED_CACHE_ENABLED = True
+EMBED_CACHE_DIR = BASE_DIR / "data" / "cache" / "embeddings"
+EMBED_CACHE_MEM_ITEMS = 50_000
 
 # Semantic chunking hyperparams
 SEM_SIM_THRESHOLD = 0.7   # lower => bigger chunks, higher => more splits
 SEM_MIN_CHARS = 200
 SEM_MAX_CHARS = 900
 
+# Index build: chunks per embed/write batch (bounds peak memory of build_index)
+INDEX_BATCH_SIZE = 256
+
+# How chunk vectors are produced at index time:
+#   "reencode" => embed each finished chunk with the model (second embedding pass)
+#   "pooled"   => normalized mean of the chunk's sentence vectors (no second pass)
+CHUNK_EMBED_MODE = "reencode"
+# In pooled mode, re-encode this many chunks per file and report cosine(pooled, encoded)
+POOLED_CHECK_PER_FILE = 4
+
 # Retrieval
 TOP_K = 5
+# Upper bounds for the per-request knobs accepted by the server (400 above them)
+MAX_TOP_K = 50
+MAX_RERANK_DEPTH = 200
+# "dense" (vector index only) or "hybrid" (vector index + BM25, reciprocal rank fusion)
+RETRIEVAL_MODE = "dense"
+BM25_DIR = BASE_DIR / "data" / "bm25"
+BM25_K1 = 1.2
+BM25_B = 0.75
+HYBRID_CANDIDATES = 20  # depth of each ranked list before fusion
+RRF_K = 60
+# MMR diversification on top of RETRIEVAL_MODE: pick TOP_K of MMR_FETCH_K candidates
+MMR_ENABLED = False
+MMR_FETCH_K = 20
+MMR_LAMBDA = 0.7  # 1.0 => pure relevance, lower => more diverse
+
+# Optional cross-encoder rerank: over-fetch RERANK_DEPTH candidates, keep the best TOP_K
+RERANK_ENABLED = False
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_DEPTH = 20
+RERANK_BATCH_SIZE = 32
+RERANK_CACHE_ITEMS = 20_000  # (query, chunk) pair scores kept in memory
+
+# Semantic answer cache: reuse the answer of an earlier question with cosine >= threshold
+# (same request settings, same index version)
+ANSWER_CACHE_ENABLED = False  # opt-in: near-paraphrases can differ in meaning ("advantages" / "disadvantages")
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_MAX_ITEMS = 10_000
+# Exact cache: identical (normalized) requests reuse retrieval results / answers
+EXACT_CACHE_ENABLED = True
+EXACT_CACHE_MAX_ITEMS = 10_000
+EXACT_CACHE_TTL_S = 24 * 3600
+EXACT_CACHE_PATH = BASE_DIR / "data" / "cache" / "exact_answers.jsonl"  # None => memory only
+
+# Server: coalesce concurrent query embeddings into one batch
+QUERY_BATCH_MAX_SIZE = 64
+QUERY_BATCH_MAX_WAIT_MS = 5
+
+# Generation batching (server): concurrent /query requests are generated
+# together in one left-padded model.generate call. Batches of 2+ are
+# prefilled in full and skip the prefix KV cache (left padding shifts each
+# row's prefix), so the two don't combine: off by default, the prefix cache
+# wins. Turn on for many concurrent users, where batching pays off more.
+GEN_BATCH_ENABLED = False
+GEN_BATCH_MAX_SIZE = 8
+GEN_BATCH_MAX_WAIT_MS = 20
 
 # LLM model (HuggingFace)
 LLAMA_MODEL_NAME = "meta-llama/Llama-3.2-3B-Instruct"
+# Reuse the KV cache of each prompt strategy's fixed head (role, rules, examples)
+PREFIX_CACHE_ENABLED = True
+# Hard cap: longer prompts are cut from the end by the tokenizer
+LLM_MAX_PROMPT_TOKENS = 2048
+# Streaming: give up when the model produced no new text for this long
+LLM_STREAM_TIMEOUT_S = 120
+
+# Context packing: ranked chunks are fitted (last one trimmed at a sentence
+# boundary) so the whole prompt stays within PROMPT_TOKEN_BUDGET tokens.
+# Chunk token counts are stored at index time (metadata "n_tokens").
+CONTEXT_PACKING_ENABLED = True
+PROMPT_TOKEN_BUDGET = 1536
+
+# Extractive compression (before packing): per retrieved chunk keep the
+# COMPRESS_TOP_SENTENCES sentences closest to the question, plus
+# COMPRESS_NEIGHBOURS on each side. Sentence vectors from ingest are served
+# by the embedding cache.
+COMPRESSION_ENABLED = False
+COMPRESS_TOP_SENTENCES = 2
+COMPRESS_NEIGHBOURS = 1
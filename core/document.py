@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
-from typing import Optional, Dict
-import uuid
+from typing import Optional, Dict, Any
+from core.hashing import stable_id
 
 
 @dataclass()
@@ -12,8 +12,23 @@ class DocUnit:
     slide_num: Optional[int] = None
     section_title: Optional[str] = None
     extra_meta : Optional[Dict] = None
+    # Path relative to RAW_DIR (set by the ingest pipeline): same-named files
+    # in different folders must not share IDs. Falls back to the filename.
+    source: Optional[str] = None
 
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    # Derived from content in __post_init__ unless given explicitly
+    id: Optional[str] = None
+
+    def __post_init__(self):
+        if self.id is None:
+            self.id = stable_id(
+                self.source if self.source is not None else self.filename,
+                self.file_type,
+                self.page_num,
+                self.slide_num,
+                self.section_title,
+                self.text,
+            )
 
     def to_metadata(self) -> Dict:
         meta = {
@@ -37,4 +52,11 @@ class Chunk:
     metadata: Dict
     parent_id: str
 
-    chunk_id: str = field(default_factory=lambda: str(uuid.uuid4()))
\ No newline at end of file
+    # Same parent + same text => same ID, so re-indexing is idempotent
+    chunk_id: Optional[str] = None
+    # Optional precomputed vector (pooled from sentence embeddings at chunking time)
+    embedding: Optional[Any] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.chunk_id is None:
+            self.chunk_id = stable_id(self.parent_id, self.text)
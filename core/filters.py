@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Exact-match fields: a value or a list of accepted values
+CATEGORICAL_FIELDS = ("filename", "file_type", "section_title")
+# Inclusive ranges: "page_range": [lo, hi] filters on metadata "page_num"
+RANGE_FIELDS = {"page_range": "page_num", "slide_range": "slide_num"}
+
+
+def normalize_filters(raw: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Validates a user filter and returns its canonical form, or None for "no filter".
+
+      {"filename": "OB Unit-2.pdf", "page_range": [3, 10]}
+        => {"filename": ["OB Unit-2.pdf"], "page_num": (3, 10)}
+
+    Either end of a range may be None (open). Raises ValueError on unknown
+    fields or malformed values.
+    """
+    if not raw:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("filters must be an object")
+
+    out: Dict[str, Any] = {}
+    for key, value in raw.items():
+        if value is None:
+            continue
+        if key in CATEGORICAL_FIELDS:
+            values = value if isinstance(value, (list, tuple)) else [value]
+            if not values or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"filter '{key}' must be a string or a list of strings")
+            out[key] = list(values)
+        elif key in RANGE_FIELDS:
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValueError(f"filter '{key}' must be [lo, hi]")
+            lo, hi = (None if v is None else int(v) for v in value)
+            if lo is not None and hi is not None and lo > hi:
+                raise ValueError(f"filter '{key}': lo > hi")
+            out[RANGE_FIELDS[key]] = (lo, hi)
+        else:
+            allowed = ", ".join(CATEGORICAL_FIELDS + tuple(RANGE_FIELDS))
+            raise ValueError(f"Unknown filter '{key}' (allowed: {allowed})")
+    return out or None
+
+
+def matches(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Does one chunk's metadata satisfy a canonical filter?"""
+    if not filters:
+        return True
+    for key, cond in filters.items():
+        value = metadata.get(key)
+        if isinstance(cond, list):
+            if value not in cond:
+                return False
+        else:
+            lo, hi = cond
+            if value is None or (lo is not None and value < lo) or (hi is not None and value > hi):
+                return False
+    return True
+
+
+def to_chroma_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Canonical filter => Chroma `where` clause (evaluated inside Chroma)."""
+    if not filters:
+        return None
+    clauses: List[Dict[str, Any]] = []
+    for key, cond in filters.items():
+        if isinstance(cond, list):
+            clauses.append({key: cond[0]} if len(cond) == 1 else {key: {"$in": cond}})
+        else:
+            lo, hi = cond
+            if lo is not None:
+                clauses.append({key: {"$gte": lo}})
+            if hi is not None:
+                clauses.append({key: {"$lte": hi}})
+            if lo is None and hi is None:
+                clauses.append({key: {"$gte": -(2 ** 31)}})  # field must exist
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def range_bounds(cond: Tuple[Optional[int], Optional[int]]) -> Tuple[int, int]:
+    lo, hi = cond
+    return (-(2 ** 31) + 1 if lo is None else lo, 2 ** 31 - 1 if hi is None else hi)
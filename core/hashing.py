@@ -0,0 +1,27 @@
+import hashlib
+from pathlib import Path
+from typing import Any
+
+
+def stable_id(*parts: Any) -> str:
+    """
+    Deterministic ID derived from content.
+    Re-indexing the same text always yields the same ID, so re-runs
+    overwrite rows instead of duplicating them.
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")  # field separator, so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Streams the file through sha256 (does not load it whole into memory).
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+import numpy as np
 
 class Chunker(ABC):
     @abstractmethod
@@ -12,43 +13,113 @@ class Loader(ABC):
         pass
 
 class Embedder(ABC):
+    """
+    Vectors travel as contiguous float32 NumPy arrays end to end
+    (see core.vectors.as_matrix); only a backend that truly needs
+    Python lists converts, at its own boundary.
+    """
     @abstractmethod
-    def embed(self, texts: List[str]):
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 array."""
         pass
 
+    def embed_numpy(self, texts: List[str]) -> np.ndarray:
+        """Alias of embed(), kept for older call sites."""
+        return self.embed(texts)
+
 class Index(ABC):
     @abstractmethod
     def add(
         self,
         documents: List[str],
-        embeddings,
+        embeddings: np.ndarray,
         metadatas: List[Dict],
         ids: List[str],
     ):
+        """`embeddings`: (len(documents), dim) float32 array."""
         pass
 
     @abstractmethod
     def query(
         self,
-        query_embedding,
+        query_embedding: np.ndarray,
         top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
     ):
+        """
+        `query_embedding`: 1-D float32 array.
+        `filters`: canonical metadata filter (core.filters.normalize_filters),
+        applied inside the index so top_k counts only matching chunks.
+        """
         pass
 
+    def query_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict]]:
+        """
+        One result list per row of the (n, dim) `query_embeddings`.
+        Backends that can search several queries in one call override this.
+        """
+        return [self.query(q, top_k, filters) for q in query_embeddings]
+
     @abstractmethod
     def get(self, ids: List[str]) -> List[Dict]:
         """Retrieve documents by ID (required for RAPTOR)"""
         pass
 
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Remove documents by ID (required for incremental re-indexing)"""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live documents (required for build_index state checks)"""
+        pass
+
+    @abstractmethod
+    def reset(self):
+        """Remove all documents (required for full rebuilds)"""
+        pass
+
+    def compact(self):
+        """Optional maintenance hook after a build (e.g. drop tombstoned rows)."""
+        pass
+
 class Retriever(ABC):
     """
     Abstract base class for any retrieval strategy.
     It takes a query string and returns a list of relevant content (chunks/nodes).
+    A caller that already embedded the query (with the retriever's embedder)
+    can pass the raw vector(s) to skip encoding it again.
     """
     @abstractmethod
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict]:
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[Dict]:
         pass
 
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict]]:
+        """
+        One result list per query. Override to batch the embedding / index work.
+        """
+        if query_embeddings is None:
+            return [self.retrieve(q, top_k, filters) for q in queries]
+        return [self.retrieve(q, top_k, filters, e) for q, e in zip(queries, query_embeddings)]
+
 class Generator(ABC):
     """
     Abstract base class for the LLM response generation.
@@ -57,3 +128,17 @@ class Generator(ABC):
     @abstractmethod
     def generate(self, prompt: str, **kwargs) -> str:
         pass
+
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Yields the generated text in pieces as it is produced.
+        Default: one piece, the whole generate() output.
+        """
+        yield self.generate(prompt, **kwargs)
+
+    def generate_many(self, prompts: List[str], **kwargs) -> List[str]:
+        """
+        Generate for several prompts with the same settings.
+        Default: loops over generate(); backends override with a batched call.
+        """
+        return [self.generate(p, **kwargs) for p in prompts]
@@ -0,0 +1,19 @@
+from typing import Any
+
+import numpy as np
+
+
+def as_matrix(x: Any) -> np.ndarray:
+    """
+    The one vector format passed between Embedder, Index and Retriever:
+    a 2-D, C-contiguous float32 array. No-op (no copy) when `x` already is one.
+    """
+    arr = np.ascontiguousarray(x, dtype=np.float32)
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1) if arr.size else arr.reshape(0, 0)
+    return arr
+
+
+def as_vector(x: Any) -> np.ndarray:
+    """A single embedding as a 1-D, contiguous float32 array."""
+    return np.ascontiguousarray(x, dtype=np.float32).reshape(-1)
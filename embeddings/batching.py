@@ -0,0 +1,90 @@
+# embeddings/batching.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+import numpy as np
+
+from core.interfaces import Embedder
+from config import QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT_MS
+
+
+class MicroBatchingEmbedder(Embedder):
+    """
+    Request-coalescing wrapper around another Embedder.
+
+    Concurrent callers (e.g. Flask request threads each embedding one query)
+    enqueue their texts; a single worker thread waits up to `max_wait_ms` after
+    the first arrival, or until `max_batch` texts are queued, then runs them as
+    ONE batch through the wrapped model and hands each caller its rows.
+    A lone request pays at most `max_wait_ms` extra latency.
+    """
+
+    def __init__(
+        self,
+        inner: Embedder,
+        max_batch: int = QUERY_BATCH_MAX_SIZE,
+        max_wait_ms: float = QUERY_BATCH_MAX_WAIT_MS,
+    ):
+        self.inner = inner
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+
+        self.batches = 0
+        self.texts = 0
+
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        fut: Future = Future()
+        self._queue.put((list(texts), fut))
+        return fut.result()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]  # block until there is work
+            n = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+
+            while n < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n += len(item[0])
+
+            self._process(pending)
+
+    def _process(self, pending):
+        flat = [t for texts, _ in pending for t in texts]
+        try:
+            vecs = self.inner.embed(flat)
+        except Exception as e:
+            for _, fut in pending:
+                fut.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(flat)
+
+        offset = 0
+        for texts, fut in pending:
+            fut.set_result(vecs[offset:offset + len(texts)])
+            offset += len(texts)
@@ -0,0 +1,203 @@
+# embeddings/cache.py
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import EMBED_CACHE_DIR, EMBED_CACHE_MEM_ITEMS
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def cached_encode(
+    cache: Optional["EmbeddingCache"],
+    texts: List[str],
+    encode: Callable[[List[str]], np.ndarray],
+) -> np.ndarray:
+    """
+    Serves `texts` from `cache`, calling `encode` only for distinct misses.
+    Shared by every Embedder backend.
+    """
+    if cache is None or not texts:
+        return encode(texts)
+
+    cached, missing = cache.lookup(texts)
+    if missing:
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        fresh = encode(unique)
+        cache.store(unique, fresh)
+        by_text = dict(zip(unique, fresh))
+        for i in missing:
+            cached[i] = by_text[texts[i]]
+
+    return np.stack(cached).astype(np.float32, copy=False)
+
+
+class EmbeddingCache:
+    """
+    Two-level cache of text -> vector for ONE embedding model.
+
+    Level 1: bounded in-memory LRU.
+    Level 2: append-only store on disk, one directory per model:
+        vectors.f32  raw float32 rows, read through np.memmap (no full load)
+        keys.txt     "<sha1(text)> <row>" per line
+        meta.json    {"model": ..., "dim": ...}
+    Appends take an flock, so several processes can share one store.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Path = EMBED_CACHE_DIR,
+        max_items: int = EMBED_CACHE_MEM_ITEMS,
+        persist: bool = True,
+    ):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+
+        if persist:
+            safe = model_name.replace("/", "__")
+            self.dir = Path(cache_dir) / safe
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._vec_path = self.dir / "vectors.f32"
+            self._key_path = self.dir / "keys.txt"
+            self._meta_path = self.dir / "meta.json"
+            self._load_index()
+
+    # ── public API ─────────────────────────────────────────────────
+
+    def lookup(self, texts: List[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """
+        Returns (vectors, missing): vectors[i] is None for every i in `missing`.
+        """
+        out: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: List[int] = []
+        with self._lock:
+            for i, t in enumerate(texts):
+                k = text_key(t)
+                v = self._lru.get(k)
+                if v is not None:
+                    self._lru.move_to_end(k)
+                    self.hits_mem += 1
+                    out[i] = v
+                    continue
+
+                v = self._read_disk(k)
+                if v is not None:
+                    self.hits_disk += 1
+                    self._remember(k, v)
+                    out[i] = v
+                    continue
+
+                self.misses += 1
+                missing.append(i)
+        return out, missing
+
+    def store(self, texts: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            new_keys, new_rows = [], []
+            for t, v in zip(texts, vectors):
+                k = text_key(t)
+                v = v.copy()  # don't pin the caller's whole batch array in the LRU
+                self._remember(k, v)
+                if self.persist and k not in self._rows:
+                    new_keys.append(k)
+                    new_rows.append(v)
+            if new_keys:
+                self._append_disk(new_keys, np.stack(new_rows))
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits_mem + self.hits_disk + self.misses
+        return {
+            "hits_mem": self.hits_mem,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": (self.hits_mem + self.hits_disk) / total if total else 0.0,
+            "disk_entries": len(self._rows),
+        }
+
+    def report(self) -> str:
+        s = self.stats()
+        return (
+            f"embedding cache: {s['hit_rate']:.1%} hit rate "
+            f"({s['hits_mem']} mem, {s['hits_disk']} disk, {s['misses']} misses; "
+            f"{s['disk_entries']} on disk)"
+        )
+
+    # ── internals ──────────────────────────────────────────────────
+
+    def _remember(self, k: str, v: np.ndarray):
+        self._lru[k] = v
+        self._lru.move_to_end(k)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _load_index(self):
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            self.dim = meta.get("dim")
+        if self.dim is None or not self._key_path.exists():
+            return
+
+        n_rows = self._vec_path.stat().st_size // (4 * self.dim) if self._vec_path.exists() else 0
+        with open(self._key_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2:
+                    continue  # torn last line after a crash
+                row = int(parts[1])
+                if row < n_rows:
+                    self._rows[parts[0]] = row
+        self._mmap = None
+
+    def _read_disk(self, k: str) -> Optional[np.ndarray]:
+        if not self.persist:
+            return None
+        row = self._rows.get(k)
+        if row is None:
+            return None
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            n_rows = self._vec_path.stat().st_size // (4 * self.dim)
+            self._mmap = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(n_rows, self.dim))
+        return np.array(self._mmap[row])  # copy out of the mapping
+
+    def _append_disk(self, keys: List[str], rows: np.ndarray):
+        if self.dim is None:
+            self.dim = int(rows.shape[1])
+            self._meta_path.write_text(json.dumps({"model": self.model_name, "dim": self.dim}), encoding="utf-8")
+
+        with open(self._vec_path, "ab") as vf:
+            fcntl.flock(vf, fcntl.LOCK_EX)
+            try:
+                vf.seek(0, os.SEEK_END)
+                first_row = vf.tell() // (4 * self.dim)
+                vf.write(rows.tobytes())
+                vf.flush()
+                # vectors first, keys second: a key never points at a row that isn't there
+                with open(self._key_path, "a", encoding="utf-8") as kf:
+                    kf.write("".join(f"{k} {first_row + i}\n" for i, k in enumerate(keys)))
+            finally:
+                fcntl.flock(vf, fcntl.LOCK_UN)
+
+        for i, k in enumerate(keys):
+            self._rows[k] = first_row + i
@@ -1,22 +1,29 @@
-from typing import List, Union
+from typing import List, Optional
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from core.interfaces import Embedder
-from config import EMBED_MODEL_NAME
+from core.vectors import as_matrix
+from embeddings.cache import EmbeddingCache, cached_encode
+from config import EMBED_MODEL_NAME, EMBED_BATCH_SIZE, EMBED_CACHE_ENABLED
 
 class HuggingFaceEmbedder(Embedder):
-    def __init__(self, model_name: str = EMBED_MODEL_NAME):
+    def __init__(
+        self,
+        model_name: str = EMBED_MODEL_NAME,
+        batch_size: int = EMBED_BATCH_SIZE,
+        use_cache: bool = EMBED_CACHE_ENABLED,
+    ):
         self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        # Only cache misses reach the model
+        self.cache: Optional[EmbeddingCache] = EmbeddingCache(model_name) if use_cache else None
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def embed(self, texts: List[str]) -> np.ndarray:
         """
-        Returns a list of vectors (lists of floats).
+        Returns a (len(texts), dim) contiguous float32 array.
         """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
-    
-    def embed_numpy(self, texts: List[str]) -> np.ndarray:
-        """
-        Returns numpy array (useful for math/chunking).
-        """
-        return self.model.encode(texts, convert_to_numpy=True)
+        return as_matrix(cached_encode(self.cache, texts, self._encode))
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
@@ -0,0 +1,19 @@
+# embeddings/factory.py
+from core.interfaces import Embedder
+from config import EMBED_BACKEND, EMBED_MODEL_NAME
+
+
+def make_embedder(backend: str = EMBED_BACKEND, model_name: str = EMBED_MODEL_NAME) -> Embedder:
+    """
+    Builds the Embedder selected by EMBED_BACKEND in config.py.
+      "torch"     => HuggingFaceEmbedder (fp32 SentenceTransformer)
+      "onnx-int8" => OnnxEmbedder (int8-quantized ONNX Runtime, CPU)
+    Imports are lazy so an ONNX-only worker never loads torch / sentence-transformers.
+    """
+    if backend == "torch":
+        from embeddings.embedder import HuggingFaceEmbedder
+        return HuggingFaceEmbedder(model_name=model_name)
+    if backend == "onnx-int8":
+        from embeddings.onnx_embedder import OnnxEmbedder
+        return OnnxEmbedder(model_name=model_name)
+    raise ValueError(f"Unknown EMBED_BACKEND: {backend!r}")
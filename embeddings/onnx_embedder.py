@@ -0,0 +1,134 @@
+# embeddings/onnx_embedder.py
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+from core.interfaces import Embedder
+from core.vectors import as_matrix
+from embeddings.cache import EmbeddingCache, cached_encode
+from config import (
+    EMBED_MODEL_NAME,
+    EMBED_BATCH_SIZE,
+    EMBED_CACHE_ENABLED,
+    ONNX_MODEL_DIR,
+    ONNX_NUM_THREADS,
+)
+
+QUANTIZED_FILE = "model.int8.onnx"
+SOURCE_FILE = "source_model.txt"  # name of the model the export was made from
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's max_seq_length
+
+
+def onnx_model_dir(model_name: str, root: Path = ONNX_MODEL_DIR) -> Path:
+    """Export location of `model_name` (same naming as the embedding cache)."""
+    return Path(root) / model_name.replace("/", "__")
+
+
+def export_quantized(model_name: str = EMBED_MODEL_NAME, out_dir: Optional[Path] = None) -> Path:
+    """
+    One-off export: HF transformer -> ONNX (fp32) -> dynamic int8 quantization.
+    Only the transformer is exported; pooling + normalization run in NumPy.
+    Returns the path of the quantized model.
+    """
+    import torch
+    from transformers import AutoModel
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    out_dir = Path(out_dir) if out_dir is not None else onnx_model_dir(model_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = out_dir / "model.onnx"
+    int8_path = out_dir / QUANTIZED_FILE
+
+    print(f"Exporting {model_name} to ONNX: {fp32_path}")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    dynamic = {name: {0: "batch", 1: "seq"} for name in input_names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[k] for k in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=14,
+        )
+
+    print(f"Quantizing (dynamic int8): {int8_path}")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(str(out_dir))
+    (out_dir / SOURCE_FILE).write_text(model_name, encoding="utf-8")
+    return int8_path
+
+
+class OnnxEmbedder(Embedder):
+    """
+    CPU embedding backend: int8-quantized export of the sentence-transformer
+    run with ONNX Runtime. Reproduces the sentence-transformers pipeline for
+    all-MiniLM-L6-v2 (mean pooling over the attention mask + L2 normalization),
+    so vectors are interchangeable with HuggingFaceEmbedder's up to quantization error.
+    The model is exported on first use into its own directory under
+    ONNX_MODEL_DIR, and re-exported if that directory holds another model's export.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBED_MODEL_NAME,
+        model_dir: Optional[Path] = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        num_threads: int = ONNX_NUM_THREADS,
+        use_cache: bool = EMBED_CACHE_ENABLED,
+    ):
+        model_dir = Path(model_dir) if model_dir is not None else onnx_model_dir(model_name)
+        model_path = model_dir / QUANTIZED_FILE
+        source = model_dir / SOURCE_FILE
+        if not model_path.exists() or not source.exists() or source.read_text(encoding="utf-8").strip() != model_name:
+            model_path = export_quantized(model_name, model_dir)
+
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            opts.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(model_path), opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        # int8 vectors differ slightly from fp32 ones: keep them in their own cache
+        self.cache: Optional[EmbeddingCache] = (
+            EmbeddingCache(f"{model_name}@onnx-int8") if use_cache else None
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return as_matrix(cached_encode(self.cache, texts, self._encode))
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            enc = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+            # mean pooling over real tokens, then L2 normalize
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append(pooled.astype(np.float32))
+
+        return np.concatenate(out, axis=0) if out else np.zeros((0, 0), dtype=np.float32)
@@ -0,0 +1,110 @@
+# generation/batching.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterator, List
+
+from core.interfaces import Generator
+from config import GEN_BATCH_MAX_SIZE, GEN_BATCH_MAX_WAIT_MS
+
+
+class BatchingGenerator(Generator):
+    """
+    Request-batching scheduler in front of another Generator.
+
+    Concurrent callers (Flask request threads) enqueue their prompts; a single
+    worker thread collects up to `max_batch` of them and runs each group with
+    identical settings (max_new_tokens, temperature, ...) through ONE
+    inner.generate_many call, then hands every caller its own text.
+
+    New requests are admitted at batch boundaries: whatever queued up while a
+    batch was generating forms the next batch straight away, without waiting.
+    Only when the worker was idle does it hold the first request for up to
+    `max_wait_ms` so near-simultaneous arrivals can share a batch.
+
+    generate_stream() is not batched; it goes straight to the inner generator.
+    """
+
+    def __init__(
+        self,
+        inner: Generator,
+        max_batch: int = GEN_BATCH_MAX_SIZE,
+        max_wait_ms: float = GEN_BATCH_MAX_WAIT_MS,
+    ):
+        self.inner = inner
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+        self._worker = threading.Thread(target=self._run, name="gen-batcher", daemon=True)
+        self._worker.start()
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        fut: Future = Future()
+        self._queue.put((prompt, kwargs, fut))
+        return fut.result()
+
+    def generate_many(self, prompts: List[str], **kwargs) -> List[str]:
+        futs = []
+        for prompt in prompts:
+            fut: Future = Future()
+            self._queue.put((prompt, kwargs, fut))
+            futs.append(fut)
+        return [fut.result() for fut in futs]
+
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        return self.inner.generate_stream(prompt, **kwargs)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize(),
+        }
+
+    def _run(self):
+        while True:
+            backlog = not self._queue.empty()
+            pending = [self._queue.get()]  # block until there is work
+            deadline = time.perf_counter() + (0.0 if backlog else self.max_wait)
+
+            while len(pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+
+            # one model call per distinct set of generation settings
+            groups = {}
+            for item in pending:
+                groups.setdefault(tuple(sorted(item[1].items())), []).append(item)
+            for items in groups.values():
+                self._process(items)
+
+    def _process(self, items):
+        prompts = [prompt for prompt, _, _ in items]
+        try:
+            texts = self.inner.generate_many(prompts, **items[0][1])
+        except Exception as e:
+            for _, _, fut in items:
+                fut.set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+
+        for (_, _, fut), text in zip(items, texts):
+            fut.set_result(text)
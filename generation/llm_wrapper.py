@@ -1,12 +1,38 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+from threading import Event, Thread
+from typing import Iterator, List, Optional
+
+from transformers import (
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    BitsAndBytesConfig,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
 import torch
-from config import LLAMA_MODEL_NAME
+from config import LLAMA_MODEL_NAME, LLM_MAX_PROMPT_TOKENS, LLM_STREAM_TIMEOUT_S, PREFIX_CACHE_ENABLED
 
 
 from core.interfaces import Generator
+from generation.prefix_cache import PrefixKVCache
+from prompts.registry import static_prefixes
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Ends generation as soon as `event` is set (e.g. the client went away)."""
+
+    def __init__(self, event: Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
 
 class Llama32Local(Generator):
-    def __init__(self, model_name: str = LLAMA_MODEL_NAME):
+    def __init__(self, model_name: str = LLAMA_MODEL_NAME, prefixes: Optional[List[str]] = None):
+        """
+        `prefixes`: fixed prompt heads whose KV cache is reused across calls
+        (default: every prompt strategy's, when PREFIX_CACHE_ENABLED).
+        """
         print(f"Loading Llama model: {model_name}")
 
         quant_config = BitsAndBytesConfig(
@@ -19,6 +45,9 @@ class Llama32Local(Generator):
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         if self.tokenizer.pad_token_id is None:
             self.tokenizer.pad_token = self.tokenizer.eos_token
+        # decoder-only batches must be padded on the left so every prompt
+        # ends right where generation starts
+        self.tokenizer.padding_side = "left"
 
         self.model = AutoModelForCausalLM.from_pretrained(
             model_name,
@@ -29,6 +58,55 @@ class Llama32Local(Generator):
 
         self.model.eval()
 
+        self.prefix_cache = None
+        if prefixes is None and PREFIX_CACHE_ENABLED:
+            prefixes = static_prefixes()
+        if prefixes:
+            self.prefix_cache = PrefixKVCache(self.model, self.tokenizer, prefixes)
+
+    def _inputs(self, prompt, padding: bool = False):
+        return self.tokenizer(
+            prompt,
+            return_tensors="pt",
+            padding=padding,
+            truncation=True,
+            max_length=LLM_MAX_PROMPT_TOKENS,
+        ).to(self.model.device)
+
+    def _prompt_inputs(self, prompt: str):
+        """
+        (model inputs, past_key_values or None) for a single prompt. With a
+        cached prefix, the ids are the prefix's plus the rest tokenized on
+        its own, and generation only prefills the rest.
+        """
+        prefix = self.prefix_cache.match(prompt) if self.prefix_cache is not None else None
+        if prefix is None:
+            return self._inputs(prompt), None
+
+        prefix_ids, past = self.prefix_cache.get(prefix)
+        rest_ids = self.tokenizer(
+            prompt[len(prefix):],
+            return_tensors="pt",
+            add_special_tokens=False,
+            truncation=True,
+            max_length=max(1, LLM_MAX_PROMPT_TOKENS - prefix_ids.shape[1]),
+        ).input_ids.to(self.model.device)
+        input_ids = torch.cat([prefix_ids, rest_ids], dim=1)
+        return {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}, past
+
+    def _generate_kwargs(self, max_new_tokens: int, temperature: float, top_p: float, past=None):
+        kwargs = dict(
+            max_new_tokens=max_new_tokens,
+            do_sample=True,               # 🔑 REQUIRED
+            temperature=temperature,      # 🔑 NOW USED
+            top_p=top_p,
+            pad_token_id=self.tokenizer.eos_token_id,
+            eos_token_id=self.tokenizer.eos_token_id,
+        )
+        if past is not None:
+            kwargs["past_key_values"] = past
+        return kwargs
+
     def generate(
         self,
         prompt: str,
@@ -37,22 +115,12 @@ class Llama32Local(Generator):
         top_p: float = 0.9,
     ) -> str:
 
-        inputs = self.tokenizer(
-            prompt,
-            return_tensors="pt",
-            truncation=True,
-            max_length=2048,
-        ).to(self.model.device)
+        inputs, past = self._prompt_inputs(prompt)
 
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
-                max_new_tokens=max_new_tokens,
-                do_sample=True,               # 🔑 REQUIRED
-                temperature=temperature,      # 🔑 NOW USED
-                top_p=top_p,
-                pad_token_id=self.tokenizer.eos_token_id,
-                eos_token_id=self.tokenizer.eos_token_id,
+                **self._generate_kwargs(max_new_tokens, temperature, top_p, past),
             )
 
         # 🔥 CRITICAL FIX: slice off the prompt tokens
@@ -64,3 +132,87 @@ class Llama32Local(Generator):
         )
 
         return decoded.strip()
+
+    def generate_many(
+        self,
+        prompts: List[str],
+        max_new_tokens: int = 256,
+        temperature: float = 0.6,
+        top_p: float = 0.9,
+    ) -> List[str]:
+        """
+        One left-padded model.generate call for all prompts. Sequences that
+        hit EOS early are padded until the longest one finishes; the pad
+        (= EOS) tokens are dropped when decoding. Batches are prefilled in
+        full: left padding shifts each row's prefix, so the prefix cache
+        only serves single prompts.
+        """
+        if len(prompts) <= 1:
+            return [self.generate(p, max_new_tokens, temperature, top_p) for p in prompts]
+
+        inputs = self._inputs(list(prompts), padding=True)
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                **self._generate_kwargs(max_new_tokens, temperature, top_p),
+            )
+
+        # every row shares the padded prompt length
+        generated = outputs[:, inputs["input_ids"].shape[1]:]
+        decoded = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        return [d.strip() for d in decoded]
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 256,
+        temperature: float = 0.6,
+        top_p: float = 0.9,
+    ) -> Iterator[str]:
+        """
+        Same sampling as generate(), but yields decoded text as tokens come
+        out: model.generate runs in a background thread and feeds a
+        TextIteratorStreamer (prompt tokens skipped).
+
+        An error in the worker is re-raised here; no new text for
+        LLM_STREAM_TIMEOUT_S raises queue.Empty. Closing the iterator early
+        (client disconnected) stops the worker at the next token.
+        """
+        inputs, past = self._prompt_inputs(prompt)
+        streamer = TextIteratorStreamer(
+            self.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=LLM_STREAM_TIMEOUT_S
+        )
+        stop = Event()
+        errors = []
+
+        def run():
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        **inputs,
+                        **self._generate_kwargs(max_new_tokens, temperature, top_p, past),
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop)]),
+                    )
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                streamer.end()  # unblock the consumer whatever happened
+
+        worker = Thread(target=run, name="llm-stream", daemon=True)
+        worker.start()
+        try:
+            started = False
+            for piece in streamer:
+                if not started:
+                    # match generate()'s .strip() at the start of the answer
+                    piece = piece.lstrip()
+                    started = bool(piece)
+                if piece:
+                    yield piece
+        finally:
+            stop.set()
+        worker.join()
+        if errors:
+            raise errors[0]
@@ -0,0 +1,60 @@
+# generation/prefix_cache.py
+import copy
+import threading
+from typing import Iterable, Optional, Tuple
+
+import torch
+from transformers import DynamicCache
+
+
+class PrefixKVCache:
+    """
+    Past key/values of known, fixed prompt prefixes (role + rules + strategy
+    examples, see prompts.registry.static_prefixes).
+
+    A prompt starting with a registered prefix is tokenized as
+    tokens(prefix) + tokens(rest); the prefix's KV cache is computed by one
+    forward pass the first time it is seen and then handed (as a copy, since
+    generate() extends it in place) to every later generate call, so only the
+    retrieved context and question are prefilled.
+    """
+
+    def __init__(self, model, tokenizer, prefixes: Iterable[str]):
+        self.model = model
+        self.tokenizer = tokenizer
+        # longest first: a strategy prefix wins over the plain base prefix
+        self._prefixes = sorted({p for p in prefixes if p}, key=len, reverse=True)
+        self._entries = {}  # prefix -> (input_ids (1, P), DynamicCache)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, prompt: str) -> Optional[str]:
+        for prefix in self._prefixes:
+            if prompt.startswith(prefix):
+                return prefix
+        return None
+
+    def get(self, prefix: str) -> Tuple[torch.Tensor, DynamicCache]:
+        """(prefix input_ids, a private copy of its KV cache)."""
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is None:
+                self.misses += 1
+                ids = self.tokenizer(prefix, return_tensors="pt").input_ids.to(self.model.device)
+                with torch.no_grad():
+                    past = self.model(input_ids=ids, past_key_values=DynamicCache(), use_cache=True).past_key_values
+                entry = self._entries[prefix] = (ids, past)
+            else:
+                self.hits += 1
+            ids, past = entry
+            return ids, copy.deepcopy(past)
+
+    def stats(self):
+        return {
+            "prefixes": len(self._prefixes),
+            "warm": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,26 @@
+# generation/tokens.py
+from typing import List
+
+from config import LLAMA_MODEL_NAME
+
+
+class TokenCounter:
+    """
+    Token counts under the LLM's tokenizer (tokenizer only, no model weights).
+    Used at index time to store each chunk's `n_tokens` and at query time to
+    pack the prompt into a token budget. Counts exclude special tokens.
+    """
+
+    def __init__(self, model_name: str = LLAMA_MODEL_NAME):
+        from transformers import AutoTokenizer  # heavy import, only when counting
+
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(ids) for ids in self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
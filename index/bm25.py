@@ -0,0 +1,249 @@
+# index/bm25.py
+import io
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from index.metadata import MetadataIndex, COLUMNS, MISSING
+from config import BM25_DIR, BM25_K1, BM25_B
+
+# Lower-cased runs of letters/digits: keeps course codes ("mgt201"),
+# names and formula symbols as exact-match terms
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _pack(strings: List[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack(arr: np.ndarray) -> List[str]:
+    return arr.tobytes().decode("utf-8").split("\n") if arr.size else []
+
+
+class BM25Index:
+    """
+    Compact on-disk inverted index for lexical (BM25) search over chunk texts.
+
+    Postings are CSR arrays grouped by term (doc rows int32, term freqs uint16),
+    saved as one .npz per collection; ids and vocabulary are stored as packed
+    UTF-8. Kept in step with the vector index by build_index (through
+    CheckpointedWriter): add() upserts by chunk ID, delete() drops rows, and
+    both are folded into the arrays on the next save() or search().
+    Each doc's filterable metadata is kept in a MetadataIndex, so filtered
+    searches score only matching docs, like the vector index does.
+    A reader (the server) reloads the file when another process (build_index)
+    has saved a newer one, so lexical results follow rebuilds.
+    """
+
+    def __init__(self, collection_name: str = "notes", root: Path = BM25_DIR,
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.collection_name = collection_name
+        self.path = Path(root) / f"{collection_name}.npz"
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._load()
+
+    # ── writes ─────────────────────────────────────────────────────
+
+    def add(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict]] = None):
+        metadatas = metadatas if metadatas is not None else [{}] * len(ids)
+        with self._lock:
+            rows, _ = self._meta.encode(metadatas)
+            for chunk_id, text, row in zip(ids, documents, rows):
+                self._drop(chunk_id)
+                self._pending[chunk_id] = (Counter(tokenize(text)), row)
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for chunk_id in ids:
+                self._drop(chunk_id)
+
+    def reset(self):
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._load()
+
+    def save(self):
+        """Atomic: a crash mid-save leaves the previous file intact."""
+        with self._lock:
+            if not self._dirty and self.path.exists():
+                return
+            self._merge()
+            buf = io.BytesIO()
+            np.savez(
+                buf,
+                ids=_pack(self._ids),
+                vocab=_pack(self._terms),
+                doc_len=self._doc_len,
+                offsets=self._offsets,
+                post_docs=self._post_docs,
+                post_tf=self._post_tf,
+                meta=np.asarray(self._meta.columns, dtype=np.int32),
+                meta_values=_pack(self._meta.values),
+            )
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".npz.tmp")
+            tmp.write_bytes(buf.getvalue())
+            os.replace(tmp, self.path)
+            self._dirty = False
+            self._mtime = self.path.stat().st_mtime_ns
+
+    # ── reads ──────────────────────────────────────────────────────
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return int(self._alive.sum()) + len(self._pending)
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        [(chunk_id, bm25 score)], best first; only chunks sharing a term
+        (and matching `filters`, a canonical metadata filter).
+        """
+        with self._lock:
+            self._refresh()
+            self._merge()
+            n = len(self._ids)
+            term_ids = sorted({self._vocab[t] for t in tokenize(query) if t in self._vocab})
+            if not n or not term_ids or top_k <= 0:
+                return []
+
+            avgdl = float(self._doc_len.mean()) or 1.0
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_len / avgdl)
+            scores = np.zeros(n, dtype=np.float32)
+            for t in term_ids:
+                lo, hi = self._offsets[t], self._offsets[t + 1]
+                docs = self._post_docs[lo:hi]
+                tf = self._post_tf[lo:hi].astype(np.float32)
+                df = hi - lo
+                idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+                # each doc appears once per term, so fancy += is safe
+                scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm[docs])
+
+            mask = self._meta.mask(filters, n)
+            if mask is not None:
+                scores[~mask] = 0.0
+            hits = np.flatnonzero(scores)
+            if len(hits) > top_k:
+                hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits])]
+            return [(self._ids[r], float(scores[r])) for r in hits]
+
+    # ── internals ──────────────────────────────────────────────────
+
+    def _refresh(self):
+        """Picks up a file saved by another process, unless we hold unsaved changes."""
+        if self._dirty or self._pending:
+            return
+        mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+        if mtime != self._mtime:
+            self._load()
+
+    def _load(self):
+        self._mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+        if self._mtime is not None:
+            with np.load(self.path) as data:
+                self._ids = _unpack(data["ids"])
+                self._terms = _unpack(data["vocab"])
+                self._doc_len = data["doc_len"]
+                self._offsets = data["offsets"]
+                self._post_docs = data["post_docs"]
+                self._post_tf = data["post_tf"]
+                if "meta" in data.files:
+                    self._meta = MetadataIndex(data["meta"], _unpack(data["meta_values"]))
+                else:  # saved before metadata filters: no doc matches a filter
+                    self._meta = MetadataIndex(np.full((len(self._ids), len(COLUMNS)), MISSING, dtype=np.int32))
+        else:
+            self._ids, self._terms = [], []
+            self._doc_len = np.zeros(0, dtype=np.int32)
+            self._offsets = np.zeros(1, dtype=np.int64)
+            self._post_docs = np.zeros(0, dtype=np.int32)
+            self._post_tf = np.zeros(0, dtype=np.uint16)
+            self._meta = MetadataIndex()
+        self._vocab: Dict[str, int] = {t: i for i, t in enumerate(self._terms)}
+        self._rows: Dict[str, int] = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._pending: Dict[str, Tuple[Counter, np.ndarray]] = {}
+        self._dirty = False
+
+    def _drop(self, chunk_id: str):
+        row = self._rows.pop(chunk_id, None)
+        if row is not None:
+            self._alive[row] = False
+        self._pending.pop(chunk_id, None)
+        self._dirty = True
+
+    def _merge(self):
+        """
+        Rebuilds the CSR arrays without deleted rows and with pending docs
+        appended; unused terms are dropped from the vocabulary.
+        """
+        if not self._pending and self._alive.all():
+            return
+
+        keep = np.flatnonzero(self._alive)
+        remap = np.full(len(self._ids), -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+
+        # Existing postings as (term, doc, tf) triples, minus deleted docs
+        terms = np.repeat(np.arange(len(self._terms)), np.diff(self._offsets))
+        docs = remap[self._post_docs]
+        live = docs >= 0
+        terms, docs, tfs = terms[live], docs[live], self._post_tf[live]
+
+        ids = [self._ids[r] for r in keep]
+        doc_len = [self._doc_len[keep]]
+        vocab = dict(self._vocab)
+        all_terms = list(self._terms)
+        new_t, new_d, new_f = [], [], []
+        meta_rows = [np.asarray(self._meta.columns)[keep]]
+        for chunk_id, (counts, meta_row) in self._pending.items():
+            row = len(ids)
+            ids.append(chunk_id)
+            for term, tf in counts.items():
+                if term not in vocab:
+                    vocab[term] = len(all_terms)
+                    all_terms.append(term)
+                new_t.append(vocab[term])
+                new_d.append(row)
+                new_f.append(min(tf, 65535))
+            doc_len.append(np.array([sum(counts.values())], dtype=np.int32))
+            meta_rows.append(meta_row.reshape(1, len(COLUMNS)))
+
+        terms = np.concatenate([terms, np.array(new_t, dtype=np.int64)])
+        docs = np.concatenate([docs, np.array(new_d, dtype=np.int64)])
+        tfs = np.concatenate([tfs, np.array(new_f, dtype=np.uint16)])
+
+        # Drop terms no live doc uses, then group postings by term
+        used = np.bincount(terms, minlength=len(all_terms)) > 0
+        term_map = np.cumsum(used) - 1
+        terms = term_map[terms]
+        order = np.lexsort((docs, terms))
+
+        self._ids = ids
+        self._terms = [t for t, u in zip(all_terms, used) if u]
+        self._doc_len = np.concatenate(doc_len).astype(np.int32)
+        self._post_docs = docs[order].astype(np.int32)
+        self._post_tf = tfs[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=len(self._terms)))]).astype(np.int64)
+        self._vocab = {t: i for i, t in enumerate(self._terms)}
+        self._rows = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        self._meta.replace(np.concatenate(meta_rows).astype(np.int32))
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._pending = {}
@@ -1,85 +1,203 @@
 # index/build_index.py
+import argparse
 import os
+import time
 from pathlib import Path
 from typing import List, Dict
 
-from sentence_transformers import SentenceTransformer
-
 from config import (
     RAW_DIR,
+    MANIFEST_PATH,
+    PARSE_CACHE_DIR,
     EMBED_MODEL_NAME,
+    EMBED_BACKEND,
+    INDEX_BACKEND,
+    INDEX_SHARDS,
     SEM_SIM_THRESHOLD,
     SEM_MIN_CHARS,
     SEM_MAX_CHARS,
+    INDEX_BATCH_SIZE,
+    CHUNK_EMBED_MODE,
+    LLAMA_MODEL_NAME,
 )
-from ingest.loaders import load_units_for_file
-from ingest.semantic_chunking import semantic_chunk_units
-from index.storage import ChromaIndex
-from embeddings.embedder import HuggingFaceEmbedder
+from ingest.loaders import SUPPORTED_EXTENSIONS
+from ingest.cache import UnitCache
+from index.bm25 import BM25Index
+from index.factory import open_index
+from index.manifest import IndexManifest
+from index.pipeline import IngestPipeline
+from index.version import IndexVersion
+from index.writer import CheckpointedWriter
+from embeddings.factory import make_embedder
+from generation.tokens import TokenCounter
+
+COLLECTION_NAME = "notes"
+
+
+def build_settings(chunk_embed_mode: str = CHUNK_EMBED_MODE) -> Dict:
+    """
+    Everything that changes the stored vectors. If any of it differs from the
+    manifest, incremental updates are unsafe and we rebuild from scratch.
+    """
+    return {
+        "collection": COLLECTION_NAME,
+        "index_backend": INDEX_BACKEND,
+        "index_shards": INDEX_SHARDS,  # chunk -> shard routing depends on it
+        "embed_model": EMBED_MODEL_NAME,
+        "embed_backend": EMBED_BACKEND,
+        "sim_threshold": SEM_SIM_THRESHOLD,
+        "min_chars": SEM_MIN_CHARS,
+        "max_chars": SEM_MAX_CHARS,
+        "chunk_embed_mode": chunk_embed_mode,
+        "unit_ids": "relpath",  # DocUnit / chunk IDs include the RAW_DIR-relative path
+    }
+
+
+def list_raw_files(raw_dir: Path) -> List[Path]:
+    paths = []
+    for root, _, files in os.walk(raw_dir):
+        for fname in files:
+            path = Path(root) / fname
+            if path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                paths.append(path)
+            else:
+                print(f"Skipping unsupported: {path}")
+    return sorted(paths)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build or incrementally update the notes index.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Drop the collection and re-index every file (default: only new/changed files).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) - 1),
+        help="Parser processes for PDF/DOCX/PPTX extraction (default: CPU count - 1).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INDEX_BATCH_SIZE,
+        help="Chunks per embedding/write batch; bounds peak memory (default: INDEX_BATCH_SIZE).",
+    )
+    parser.add_argument(
+        "--chunk-embed",
+        choices=["reencode", "pooled"],
+        default=CHUNK_EMBED_MODE,
+        help="reencode: embed finished chunks again; pooled: reuse sentence vectors (default: CHUNK_EMBED_MODE).",
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="Always re-parse raw files instead of reusing cached DocUnits.",
+    )
+    return parser.parse_args()
 
 
 def main():
-    print(f"Loading embedding model: {EMBED_MODEL_NAME}")
-    # embed_model = SentenceTransformer(EMBED_MODEL_NAME) -> OLD
-    embed_model = HuggingFaceEmbedder(EMBED_MODEL_NAME) # -> NEW
-
-    # Use our new Class!
-    index = ChromaIndex(collection_name="notes")
-
-    all_documents: List[str] = []
-    all_metadatas: List[Dict] = []
-    all_ids: List[str] = []
-    
-    for root, _, files in os.walk(RAW_DIR):
-        for fname in files:
-            path = Path(root) / fname
-            units = load_units_for_file(path)
-            if not units:
-                print(f"Skipping unsupported/empty: {path}")
-                continue
-
-            print(f"Processing {path} ({len(units)} units)")
-
-            chunks = semantic_chunk_units(
-                units,
-                embed_model=embed_model,
-                sim_threshold=SEM_SIM_THRESHOLD,
-                min_chars=SEM_MIN_CHARS,
-                max_chars=SEM_MAX_CHARS,
-            )
-
-            file_chunk_idx = 0  # index within this file
-
-            for chunk in chunks:
-                if not chunk.text.strip():
-                    continue
-
-                # augment metadata with per-file chunk index
-                meta = dict(chunk.metadata)  # copy to avoid mutating original
-                meta["chunk_idx"] = file_chunk_idx
-                file_chunk_idx += 1
-
-                all_documents.append(chunk.text)
-                all_metadatas.append(meta)
-                all_ids.append(chunk.chunk_id) # USE THE EXISTING UUID!
-
-    if not all_documents:
-        print("No chunks to index.")
-        return
-
-    print(f"Total chunks: {len(all_documents)}")
-    print("Embedding chunks...")
-    embeddings = embed_model.encode(all_documents, show_progress_bar=True)
-
-    print("Adding to Chroma Index (with stable IDs)...")
-    index.add(
-        documents=all_documents,
-        embeddings=embeddings.tolist(),
-        metadatas=all_metadatas,
-        ids=all_ids  # Passing the UUIDs from chunks
+    args = parse_args()
+    start = time.perf_counter()
+
+    print(f"Loading embedding model: {EMBED_MODEL_NAME} ({EMBED_BACKEND})")
+    embed_model = make_embedder()
+
+    # Per-chunk LLM token counts for prompt packing (tokenizer only)
+    try:
+        token_counter = TokenCounter()
+    except Exception as e:
+        print(f"[WARN] No token counts stored ({LLAMA_MODEL_NAME} tokenizer unavailable: {e})")
+        token_counter = None
+
+    index = open_index(COLLECTION_NAME)
+    bm25 = BM25Index(COLLECTION_NAME)
+
+    settings = build_settings(args.chunk_embed)
+    manifest = IndexManifest.load(MANIFEST_PATH)
+
+    if args.full:
+        reason = "--full requested"
+    elif manifest is None:
+        # Rows without a manifest have unknown (random) IDs; we can't diff against them
+        reason = "no manifest" if index.count() else None
+    elif not manifest.matches(settings):
+        reason = "embedding model / chunking settings changed"
+    elif not bm25.count() and any(e.chunk_ids for e in manifest.files.values()):
+        # Indexed before BM25 existed: the lexical index needs every chunk text again
+        reason = "no BM25 index"
+    else:
+        reason = None
+
+    if manifest is None or reason:
+        if reason:
+            print(f"Full rebuild ({reason}): clearing collection '{COLLECTION_NAME}'")
+            index.reset()
+            bm25.reset()
+        manifest = IndexManifest(MANIFEST_PATH, settings)
+
+    plan = manifest.plan(list_raw_files(RAW_DIR), RAW_DIR)
+    print(
+        f"Plan: {len(plan.to_index)} to index, {len(plan.removed)} removed, "
+        f"{plan.unchanged + len(plan.touched)} unchanged"
     )
 
-    print("Index built successfully!")
+    for rel in plan.removed:
+        print(f"Removing chunks of deleted file: {rel}")
+        index.delete(manifest.chunk_ids_for(rel))
+        bm25.delete(manifest.chunk_ids_for(rel))
+        manifest.forget(rel)
+
+    for path in plan.touched:
+        manifest.touch(path, RAW_DIR)
+
+    if plan.removed or plan.touched:
+        bm25.save()
+        manifest.save()
+
+    writer = CheckpointedWriter(index, manifest, RAW_DIR, batch_size=args.batch_size, lexical=bm25)
+
+    print(f"Ingesting with {args.workers} parser worker(s), batch size {args.batch_size}")
+    pipeline = IngestPipeline(
+        embed_model,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        chunk_embed_mode=args.chunk_embed,
+        parse_cache_dir=None if args.no_parse_cache else PARSE_CACHE_DIR,
+        token_counter=token_counter,
+        root=RAW_DIR,
+    )
+    try:
+        stats = pipeline.run(plan.to_index, on_batch=writer.write, on_error=writer.discard)
+    finally:
+        try:
+            # Commit whatever finished before an error / Ctrl-C, so a re-run resumes from there
+            writer.close()
+            bm25.save()
+        finally:
+            if reason or plan.removed or writer.written:
+                # Answers cached against the old contents are now stale,
+                # also when a failed / interrupted build changed the index
+                print(f"Index version: {IndexVersion(COLLECTION_NAME).bump()}")
+    index.compact()
+
+    pooled_report = stats.pooled_report()
+    if pooled_report:
+        print(pooled_report)
+    if stats.failed:
+        print(f"{stats.failed} file(s) failed and will be retried on the next run")
+    elif not args.no_parse_cache:
+        # Forget parses of files that no longer exist in this form
+        cache = UnitCache(PARSE_CACHE_DIR)
+        pruned = cache.prune(cache.key(Path(rel), e.sha256) for rel, e in manifest.files.items())
+        if pruned:
+            print(f"Pruned {pruned} stale parse-cache entries")
+    if embed_model.cache is not None:
+        print(embed_model.cache.report())
+    elapsed = time.perf_counter() - start
+    print(f"Index up to date: {stats.report()}, {bm25.count()} chunks in BM25 (total {elapsed:.1f}s)")
 
 
 if __name__ == "__main__":
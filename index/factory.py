@@ -0,0 +1,35 @@
+# index/factory.py
+from core.interfaces import Index
+from config import INDEX_BACKEND, INDEX_SHARDS
+
+
+def open_index(
+    collection_name: str = "notes",
+    backend: str = INDEX_BACKEND,
+    shards: int = INDEX_SHARDS,
+) -> Index:
+    """
+    Opens the Index selected by INDEX_BACKEND in config.py.
+      "chroma" => ChromaIndex (persistent Chroma collection)
+      "flat"   => FlatIndex (memory-mapped, exact, in-process)
+      "flat-int8" / "flat-binary" => QuantizedFlatIndex (quantized scan + exact re-score)
+    With shards > 1 (INDEX_SHARDS), a ShardedIndex over "<name>_shard<i>"
+    indexes of that backend.
+    """
+    if shards > 1:
+        from index.sharded import ShardedIndex
+        return ShardedIndex([_open_single(f"{collection_name}_shard{i}", backend) for i in range(shards)])
+    return _open_single(collection_name, backend)
+
+
+def _open_single(collection_name: str, backend: str) -> Index:
+    if backend == "chroma":
+        from index.storage import ChromaIndex
+        return ChromaIndex(collection_name=collection_name)
+    if backend == "flat":
+        from index.flat import FlatIndex
+        return FlatIndex(collection_name=collection_name)
+    if backend in ("flat-int8", "flat-binary"):
+        from index.quantized import QuantizedFlatIndex
+        return QuantizedFlatIndex(collection_name=collection_name, mode=backend.split("-", 1)[1])
+    raise ValueError(f"Unknown INDEX_BACKEND: {backend!r}")
@@ -0,0 +1,485 @@
+# index/flat.py
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.interfaces import Index
+from core.vectors import as_matrix
+from index.metadata import MetadataIndex, COLUMNS
+from config import FLAT_INDEX_DIR, FLAT_INDEX_DTYPE
+
+SCAN_BLOCK_ROWS = 16_384  # rows per matrix product; bounds scratch memory per query
+
+
+class FlatIndex(Index):
+    """
+    In-process exact vector index backed by memory-mapped files.
+
+    One directory per collection:
+        header.json   {"dim", "dtype", "count"}   (count is the commit point)
+        vectors.bin   L2-normalized rows, float32 or float16
+        alive.u8      1 byte per row; 0 = deleted / superseded
+        ids.txt       one chunk ID per row
+        docs.jsonl    {"text", "metadata"} per row
+        offsets.u64   (byte offset, length) of each row in docs.jsonl
+        meta.i32      filterable metadata per row (see index.metadata)
+        meta_values.txt  value list the categorical codes in meta.i32 point into
+
+    Queries are a blocked matrix product + argpartition over the mapped
+    vectors: exact results, no server, and opening is just reading the header.
+    Metadata filters turn into a row mask from the precomputed MetadataIndex,
+    so a filtered query only scores the matching rows.
+    Read-only mappings share page cache across worker processes.
+    Scores follow Chroma's default l2 space (squared L2 distance; for unit
+    vectors that is 2 - 2*cosine), so "lower is better" holds for callers.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "notes",
+        root: Path = FLAT_INDEX_DIR,
+        dtype: str = FLAT_INDEX_DTYPE,
+    ):
+        self.collection_name = collection_name
+        self.dir = Path(root) / collection_name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+
+        self._dtype_default = np.dtype(dtype)
+        self._header_mtime = None
+        self._load_header()
+
+    # ── Index interface ────────────────────────────────────────────
+
+    def add(
+        self,
+        documents: List[str],
+        embeddings: np.ndarray,
+        metadatas: List[Dict],
+        ids: List[str],
+    ):
+        """
+        Appends rows. Upsert semantics like ChromaIndex: an existing ID's
+        old row is tombstoned and the new one appended.
+        """
+        if not ids:
+            raise ValueError("IDs must be provided for FlatIndex.add()! use chunk.chunk_id")
+
+        vecs = _normalize(as_matrix(embeddings))
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vecs.shape[1])
+            elif vecs.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {vecs.shape[1]} != index dim {self.dim}")
+
+            self._truncate_to_count()  # drop bytes of an interrupted append
+            id_rows = self._id_rows()
+
+            # last occurrence wins inside one call, like repeated upserts
+            last = {doc_id: i for i, doc_id in enumerate(ids)}
+            keep = sorted(last.values())
+            superseded = [id_rows[ids[i]] for i in keep if ids[i] in id_rows]
+
+            start = self.n_rows
+            offsets = np.empty((len(keep), 2), dtype=np.uint64)
+            with open(self._path("docs.jsonl"), "ab") as f:
+                pos = f.tell()
+                for j, i in enumerate(keep):
+                    line = json.dumps({"text": documents[i], "metadata": metadatas[i]}, ensure_ascii=False)
+                    data = (line + "\n").encode("utf-8")
+                    f.write(data)
+                    offsets[j] = (pos, len(data))
+                    pos += len(data)
+
+            with open(self._path("vectors.bin"), "ab") as f:
+                f.write(vecs[keep].astype(self.dtype).tobytes())
+            with open(self._path("offsets.u64"), "ab") as f:
+                f.write(offsets.tobytes())
+            with open(self._path("alive.u8"), "ab") as f:
+                f.write(np.ones(len(keep), dtype=np.uint8).tobytes())
+            with open(self._path("ids.txt"), "a", encoding="utf-8") as f:
+                f.write("".join(f"{ids[i]}\n" for i in keep))
+            meta_rows, new_values = self._meta().encode([metadatas[i] for i in keep])
+            if new_values:
+                with open(self._path("meta_values.txt"), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{v}\n" for v in new_values))
+            with open(self._path("meta.i32"), "ab") as f:
+                f.write(meta_rows.tobytes())
+            self._append_extra(vecs[keep])
+
+            # tombstone before the commit: a crash in between loses the old
+            # rows until the next build re-adds them, but never leaves a
+            # committed ID with two live rows
+            if superseded:
+                self._mark_dead(superseded)
+            self._write_header(start + len(keep))  # commit
+
+            for j, i in enumerate(keep):
+                id_rows[ids[i]] = start + j
+
+        print(f"Added {len(keep)} documents to FlatIndex '{self.collection_name}'.")
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        return self.query_many(as_matrix(query_embedding), top_k, filters)[0]
+
+    def query_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        All queries in one pass over the vectors: each block is scored
+        against the whole query matrix with a single matrix product.
+        """
+        row_mask = None
+        if filters:
+            with self._lock:
+                self._refresh()
+                row_mask = self._meta().mask(filters)
+        rows, sims = self._search(as_matrix(query_embeddings), top_k, row_mask)
+        return [self._items(r, s) for r, s in zip(rows, sims)]
+
+    def get(self, ids: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            id_rows = self._id_rows()
+            rows = [id_rows[i] for i in ids if i in id_rows]
+            if not rows:
+                return []
+            vecs = np.asarray(self._vectors()[rows], dtype=np.float32)
+            fetched = []
+            for row, vec in zip(rows, vecs):
+                rec = self._record(row)
+                fetched.append({
+                    "id": self._ids()[row],
+                    "text": rec["text"],
+                    "metadata": rec["metadata"],
+                    "embedding": vec,
+                })
+            return fetched
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        with self._lock:
+            id_rows = self._id_rows()
+            rows = [id_rows.pop(i) for i in ids if i in id_rows]
+            if rows:
+                self._mark_dead(rows)
+        print(f"Deleted {len(rows)} documents from FlatIndex '{self.collection_name}'.")
+
+    # ── maintenance ────────────────────────────────────────────────
+
+    def count(self) -> int:
+        """Live (non-deleted) rows."""
+        self._refresh()
+        return int(self._alive().sum()) if self.n_rows else 0
+
+    def reset(self):
+        with self._lock:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._load_header()
+
+    def compact(self):
+        """
+        Rewrites the files without deleted rows (incremental builds leave tombstones).
+        """
+        with self._lock:
+            self._refresh()
+            if not self.n_rows:
+                return
+            alive = np.flatnonzero(self._alive())
+            if len(alive) == self.n_rows:
+                return
+
+            ids = self._ids()
+            records = [self._record(r) for r in alive]
+
+            # Build the compacted copy next to the live one, then swap directories
+            tmp_name = f"{self.collection_name}.compact"
+            tmp_root = self.dir.parent
+            shutil.rmtree(tmp_root / tmp_name, ignore_errors=True)
+            fresh = self._empty_like(tmp_name, tmp_root)
+            fresh.add(
+                documents=[r["text"] for r in records],
+                embeddings=np.asarray(self._vectors()[alive], dtype=np.float32),
+                metadatas=[r["metadata"] for r in records],
+                ids=[ids[r] for r in alive],
+            )
+
+            old = self.dir.with_name(f"{self.collection_name}.old")
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(self.dir, old)
+            os.replace(fresh.dir, self.dir)
+            shutil.rmtree(old, ignore_errors=True)
+            self._load_header()
+
+    # ── extension hooks (see index/quantized.py) ───────────────────
+
+    def _empty_like(self, collection_name: str, root: Path) -> "FlatIndex":
+        return FlatIndex(collection_name, root=root, dtype=self.dtype.name)
+
+    def _append_extra(self, vecs: np.ndarray):
+        """Write per-row side data for freshly appended (normalized) rows."""
+        pass
+
+    def _extra_sizes(self) -> Dict[str, int]:
+        """Expected byte size of each side-data file for the committed row count."""
+        return {}
+
+    def _drop_maps(self):
+        self._vec_map = self._alive_map = self._off_map = None
+        self._meta_index: Optional[MetadataIndex] = None
+
+    # ── search ─────────────────────────────────────────────────────
+
+    def _search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        row_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k for a batch of queries. Returns (rows, cosine sims),
+        each (n_queries, <=top_k), best first; slots without a candidate
+        (fewer allowed rows than top_k) have sim -inf.
+        """
+        q = _normalize(queries)
+        with self._lock:
+            self._refresh()
+            n = self.n_rows
+            if n == 0 or top_k <= 0:
+                empty = np.zeros((len(q), 0))
+                return empty.astype(np.int64), empty.astype(np.float32)
+            vecs = self._vectors()
+            allowed = self._alive().astype(bool)  # private copy: safe outside the lock
+
+        _apply_mask(allowed, row_mask)
+        k = min(top_k, n)
+
+        best_s = np.full((len(q), 0), -np.inf, dtype=np.float32)
+        best_r = np.zeros((len(q), 0), dtype=np.int64)
+
+        for rows, ok in _scan_blocks(allowed, row_mask is not None):
+            block = np.asarray(vecs[rows], dtype=np.float32)
+            s = q @ block.T
+            if ok is not None:
+                s[:, ~ok] = -np.inf
+
+            s = np.concatenate([best_s, s], axis=1)
+            r = np.concatenate([best_r, np.broadcast_to(_row_ids(rows), (len(q), s.shape[1] - best_s.shape[1]))], axis=1)
+            if s.shape[1] > k:
+                part = np.argpartition(-s, k - 1, axis=1)[:, :k]
+                s = np.take_along_axis(s, part, axis=1)
+                r = np.take_along_axis(r, part, axis=1)
+            best_s, best_r = s, r
+
+        order = np.argsort(-best_s, axis=1)
+        return np.take_along_axis(best_r, order, axis=1), np.take_along_axis(best_s, order, axis=1)
+
+    def _items(self, rows: np.ndarray, sims: np.ndarray) -> List[Dict[str, Any]]:
+        ids = self._ids()
+        items = []
+        for row, sim in zip(rows.tolist(), sims.tolist()):
+            if sim == -np.inf:
+                continue
+            rec = self._record(row)
+            items.append({
+                "text": rec["text"],
+                "metadata": rec["metadata"],
+                "id": ids[row],
+                "score": max(0.0, 2.0 - 2.0 * sim),  # squared L2 between unit vectors
+            })
+        return items
+
+    # ── storage internals ──────────────────────────────────────────
+
+    def _path(self, name: str) -> Path:
+        return self.dir / name
+
+    def _load_header(self):
+        header_path = self._path("header.json")
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            self.dim = header["dim"]
+            self.dtype = np.dtype(header["dtype"])
+            self.n_rows = header["count"]  # rows committed, including deleted ones
+            self._header_mtime = header_path.stat().st_mtime_ns
+        else:
+            self.dim, self.dtype, self.n_rows = None, self._dtype_default, 0
+            self._header_mtime = None
+        self._tail_checked = False
+        self._drop_maps()
+        self._id_list: Optional[List[str]] = None
+        self._id_row_map: Optional[Dict[str, int]] = None
+
+    def _refresh(self):
+        """Picks up rows committed by another process (e.g. a running build)."""
+        header_path = self._path("header.json")
+        mtime = header_path.stat().st_mtime_ns if header_path.exists() else None
+        if mtime != self._header_mtime:
+            self._load_header()
+
+    def _write_header(self, count: int):
+        tmp = self._path("header.json.tmp")
+        tmp.write_text(json.dumps({"dim": self.dim, "dtype": self.dtype.name, "count": count}), encoding="utf-8")
+        os.replace(tmp, self._path("header.json"))
+        self.n_rows = count
+        self._header_mtime = self._path("header.json").stat().st_mtime_ns
+        self._drop_maps()
+        self._id_list = None
+
+    def _truncate_to_count(self):
+        """Once per open: cut bytes past the committed row count (interrupted append)."""
+        if self._tail_checked or self.dim is None:
+            return
+        self._tail_checked = True
+        sizes = {
+            "vectors.bin": self.n_rows * self.dim * self.dtype.itemsize,
+            "alive.u8": self.n_rows,
+            "offsets.u64": self.n_rows * 16,
+            "meta.i32": self.n_rows * len(COLUMNS) * 4,
+            **self._extra_sizes(),
+        }
+        for name, size in sizes.items():
+            path = self._path(name)
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+        if self.n_rows:
+            offsets = self._offsets()
+            end = int(offsets[-1, 0] + offsets[-1, 1])
+        else:
+            end = 0
+        docs = self._path("docs.jsonl")
+        if docs.exists() and docs.stat().st_size > end:
+            os.truncate(docs, end)
+        values = self._path("meta_values.txt")
+        if values.exists():
+            # a torn last line would merge with the next value written
+            data = values.read_bytes()
+            if data and not data.endswith(b"\n"):
+                os.truncate(values, data.rfind(b"\n") + 1)
+        ids = self._ids() if self.n_rows else []
+        if self._path("ids.txt").exists() and len(self._read_id_lines()) != len(ids):
+            self._path("ids.txt").write_text("".join(f"{i}\n" for i in ids), encoding="utf-8")
+
+    def _vectors(self) -> np.ndarray:
+        if self._vec_map is None:
+            self._vec_map = np.memmap(self._path("vectors.bin"), dtype=self.dtype, mode="r", shape=(self.n_rows, self.dim))
+        return self._vec_map
+
+    def _meta(self) -> MetadataIndex:
+        """
+        Metadata columns of the committed rows; backfilled from docs.jsonl
+        for an index written before meta.i32 existed.
+        """
+        if self._meta_index is None:
+            values_path = self._path("meta_values.txt")
+            values = values_path.read_text(encoding="utf-8").splitlines() if values_path.exists() else []
+            cols_path = self._path("meta.i32")
+            expected = self.n_rows * len(COLUMNS) * 4
+            if self.n_rows and (not cols_path.exists() or cols_path.stat().st_size < expected):
+                index = MetadataIndex(values=values)
+                rows, new_values = index.encode([self._record(r)["metadata"] for r in range(self.n_rows)])
+                with open(values_path, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{v}\n" for v in new_values))
+                cols_path.write_bytes(rows.tobytes())
+                values = index.values
+            columns = (
+                np.memmap(cols_path, dtype=np.int32, mode="r", shape=(self.n_rows, len(COLUMNS)))
+                if self.n_rows else None
+            )
+            self._meta_index = MetadataIndex(columns, values)
+        return self._meta_index
+
+    def _alive(self) -> np.ndarray:
+        if self._alive_map is None:
+            self._alive_map = np.memmap(self._path("alive.u8"), dtype=np.uint8, mode="r", shape=(self.n_rows,))
+        return self._alive_map
+
+    def _offsets(self) -> np.ndarray:
+        if self._off_map is None:
+            self._off_map = np.memmap(self._path("offsets.u64"), dtype=np.uint64, mode="r", shape=(self.n_rows, 2))
+        return self._off_map
+
+    def _read_id_lines(self) -> List[str]:
+        path = self._path("ids.txt")
+        if not path.exists():
+            return []
+        return path.read_text(encoding="utf-8").splitlines()
+
+    def _ids(self) -> List[str]:
+        if self._id_list is None:
+            self._id_list = self._read_id_lines()[: self.n_rows]
+        return self._id_list
+
+    def _id_rows(self) -> Dict[str, int]:
+        """ID -> live row. Built lazily: pure query traffic never needs it."""
+        if self._id_row_map is None:
+            alive = self._alive() if self.n_rows else []
+            self._id_row_map = {i: r for r, i in enumerate(self._ids()) if alive[r]}
+        return self._id_row_map
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        off, length = (int(x) for x in self._offsets()[row])
+        with open(self._path("docs.jsonl"), "rb") as f:
+            f.seek(off)
+            return json.loads(f.read(length))
+
+    def _mark_dead(self, rows: List[int]):
+        alive = np.memmap(self._path("alive.u8"), dtype=np.uint8, mode="r+", shape=(self.n_rows,))
+        alive[rows] = 0
+        alive.flush()
+        del alive
+        self._alive_map = None
+
+
+def _apply_mask(allowed: np.ndarray, row_mask: Optional[np.ndarray]):
+    """In place: rows outside `row_mask` (or past its end: newer rows) are not allowed."""
+    if row_mask is None:
+        return
+    m = min(len(allowed), len(row_mask))
+    allowed[:m] &= row_mask[:m]
+    allowed[m:] = False
+
+
+def _scan_blocks(allowed: np.ndarray, filtered: bool):
+    """
+    Yields (rows, ok) per block of at most SCAN_BLOCK_ROWS rows: `rows` a
+    slice or index array into the vectors, `ok` the allowed-mask of those
+    rows (None when all are allowed). A selective filter (under a quarter of
+    the rows) gathers only the matching rows instead of scanning everything.
+    """
+    n = len(allowed)
+    if filtered:
+        matching = np.flatnonzero(allowed)
+        if len(matching) * 4 < n:
+            for start in range(0, len(matching), SCAN_BLOCK_ROWS):
+                yield matching[start:start + SCAN_BLOCK_ROWS], None
+            return
+    for start in range(0, n, SCAN_BLOCK_ROWS):
+        end = min(start + SCAN_BLOCK_ROWS, n)
+        ok = allowed[start:end]
+        if ok.any():
+            yield slice(start, end), ok
+
+
+def _row_ids(rows) -> np.ndarray:
+    return np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return (vecs / np.clip(norms, 1e-12, None)).astype(np.float32)
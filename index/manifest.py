@@ -0,0 +1,128 @@
+# index/manifest.py
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.hashing import file_sha256
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class FileEntry:
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BuildPlan:
+    to_index: List[Path] = field(default_factory=list)   # new or content changed
+    touched: List[Path] = field(default_factory=list)    # stat changed, content identical
+    removed: List[str] = field(default_factory=list)     # in manifest, gone from disk
+    unchanged: int = 0
+
+
+class IndexManifest:
+    """
+    Records what is currently in the index, per raw file:
+    size, mtime, content hash and the chunk IDs that file produced.
+    Also records the settings (model, chunking params) the index was built with;
+    if those change, every stored vector is stale and a full rebuild is needed.
+    """
+
+    def __init__(self, path: Path, settings: Dict, files: Optional[Dict[str, FileEntry]] = None):
+        self.path = Path(path)
+        self.settings = settings
+        self.files: Dict[str, FileEntry] = files or {}
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IndexManifest"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("version") != MANIFEST_VERSION:
+            return None
+        files = {rel: FileEntry(**entry) for rel, entry in raw.get("files", {}).items()}
+        return cls(path, raw.get("settings", {}), files)
+
+    def save(self):
+        """
+        Atomic write (tmp file + rename), so a crash never leaves a half-written manifest.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "files": {rel: asdict(entry) for rel, entry in sorted(self.files.items())},
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def matches(self, settings: Dict) -> bool:
+        return self.settings == settings
+
+    def plan(self, paths: List[Path], root: Path) -> BuildPlan:
+        """
+        Compares files on disk against the manifest.
+        Size + mtime is the fast path; the content hash is only computed
+        when the stat differs, so an untouched corpus costs one stat() per file.
+        """
+        plan = BuildPlan()
+        seen = set()
+
+        for path in paths:
+            rel = relpath(path, root)
+            seen.add(rel)
+            entry = self.files.get(rel)
+            st = path.stat()
+
+            if entry is None:
+                plan.to_index.append(path)
+                continue
+
+            if entry.size == st.st_size and entry.mtime == st.st_mtime:
+                plan.unchanged += 1
+                continue
+
+            if entry.size == st.st_size and entry.sha256 == file_sha256(path):
+                plan.touched.append(path)
+            else:
+                plan.to_index.append(path)
+
+        plan.removed = sorted(rel for rel in self.files if rel not in seen)
+        return plan
+
+    def record(self, path: Path, root: Path, chunk_ids: List[str], sha256: Optional[str] = None):
+        st = path.stat()
+        self.files[relpath(path, root)] = FileEntry(
+            size=st.st_size,
+            mtime=st.st_mtime,
+            sha256=sha256 or file_sha256(path),
+            chunk_ids=list(chunk_ids),
+        )
+
+    def touch(self, path: Path, root: Path):
+        """Content unchanged, only refresh the stat fields."""
+        entry = self.files[relpath(path, root)]
+        st = path.stat()
+        entry.size, entry.mtime = st.st_size, st.st_mtime
+
+    def chunk_ids_for(self, path_or_rel, root: Optional[Path] = None) -> List[str]:
+        rel = path_or_rel if root is None else relpath(path_or_rel, root)
+        entry = self.files.get(rel)
+        return list(entry.chunk_ids) if entry else []
+
+    def forget(self, rel: str):
+        self.files.pop(rel, None)
+
+
+def relpath(path: Path, root: Path) -> str:
+    return Path(path).resolve().relative_to(Path(root).resolve()).as_posix()
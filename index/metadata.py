@@ -0,0 +1,104 @@
+# index/metadata.py
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.filters import CATEGORICAL_FIELDS, RANGE_FIELDS, range_bounds
+
+# One int32 column per filterable field, in this order
+COLUMNS = CATEGORICAL_FIELDS + tuple(RANGE_FIELDS.values())
+MISSING = -(2 ** 31)  # field absent from a chunk's metadata
+
+
+class MetadataIndex:
+    """
+    Precomputed metadata -> row bitmaps for filtered search over row-addressed
+    stores (FlatIndex rows, BM25Index docs).
+
+    Each row is encoded once, at write time, as one int32 per filterable field:
+    categorical values (filename, file_type, section_title) as codes into a
+    shared value list, page/slide numbers as themselves. A filter becomes
+    packed bitmaps (1 bit per row) combined with bitwise AND/OR; bitmaps of
+    categorical values are cached, so repeated filters cost only the AND.
+    The owner persists `columns` and `values` and passes them back in.
+    """
+
+    def __init__(self, columns: Optional[np.ndarray] = None, values: Optional[List[str]] = None,
+                 cache_items: int = 256):
+        self.columns = columns if columns is not None else np.zeros((0, len(COLUMNS)), dtype=np.int32)
+        self.values: List[str] = list(values or [])
+        self._codes: Dict[str, int] = {v: i for i, v in enumerate(self.values)}
+        self._bitmaps: "OrderedDict[Tuple[int, int, int], np.ndarray]" = OrderedDict()
+        self.cache_items = cache_items
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def encode(self, metadatas: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Rows for `metadatas` as a (n, len(COLUMNS)) int32 array, plus the
+        values newly added to the value list (for the owner to persist).
+        Does not append the rows; see extend().
+        """
+        start = len(self.values)
+        rows = np.full((len(metadatas), len(COLUMNS)), MISSING, dtype=np.int32)
+        for i, meta in enumerate(metadatas):
+            for j, key in enumerate(COLUMNS):
+                value = meta.get(key)
+                if value is None:
+                    continue
+                if key in CATEGORICAL_FIELDS:
+                    value = str(value)
+                    code = self._codes.get(value)
+                    if code is None:
+                        code = self._codes[value] = len(self.values)
+                        self.values.append(value)
+                    rows[i, j] = code
+                else:
+                    rows[i, j] = int(value)
+        return rows, self.values[start:]
+
+    def extend(self, rows: np.ndarray):
+        self.columns = np.concatenate([np.asarray(self.columns), rows]) if len(self.columns) else rows
+        self._bitmaps.clear()
+
+    def replace(self, columns: np.ndarray):
+        """New row set (e.g. after a store compacts its rows); the value list is kept."""
+        self.columns = columns
+        self._bitmaps.clear()
+
+    def mask(self, filters: Optional[Dict[str, Any]], n_rows: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Boolean row mask for a canonical filter (core.filters.normalize_filters),
+        or None when there is no filter. Length is `n_rows` (default: all rows).
+        """
+        if not filters:
+            return None
+        n = len(self.columns) if n_rows is None else n_rows
+        bits: Optional[np.ndarray] = None
+        for key, cond in filters.items():
+            j = COLUMNS.index(key)
+            if isinstance(cond, list):
+                codes = [self._codes[v] for v in cond if v in self._codes]
+                field_bits = np.zeros((n + 7) // 8, dtype=np.uint8)
+                for code in codes:
+                    field_bits |= self._bitmap(j, code, n)
+            else:
+                lo, hi = range_bounds(cond)
+                col = np.asarray(self.columns[:n, j])
+                field_bits = np.packbits((col >= lo) & (col <= hi))
+            bits = field_bits if bits is None else bits & field_bits
+        return np.unpackbits(bits, count=n).astype(bool)
+
+    def _bitmap(self, col: int, code: int, n: int) -> np.ndarray:
+        key = (col, code, n)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            bitmap = np.packbits(np.asarray(self.columns[:n, col]) == code)
+            self._bitmaps[key] = bitmap
+            while len(self._bitmaps) > self.cache_items:
+                self._bitmaps.popitem(last=False)
+        else:
+            self._bitmaps.move_to_end(key)
+        return bitmap
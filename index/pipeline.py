@@ -0,0 +1,345 @@
+# index/pipeline.py
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import (
+    SEM_SIM_THRESHOLD,
+    SEM_MIN_CHARS,
+    SEM_MAX_CHARS,
+    INDEX_BATCH_SIZE,
+    CHUNK_EMBED_MODE,
+    POOLED_CHECK_PER_FILE,
+)
+from core.document import DocUnit
+from core.hashing import file_sha256
+from core.interfaces import Embedder
+from generation.tokens import TokenCounter
+from ingest.cache import UnitCache, load_units_cached
+from ingest.semantic_chunking import semantic_chunk_units
+from index.manifest import relpath
+
+_DONE = object()  # queue sentinel
+
+
+@dataclass
+class ParsedFile:
+    path: Path
+    sha256: str
+    units: List[DocUnit] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class EmbeddedBatch:
+    """
+    Up to `batch_size` embedded chunks of one file.
+    A file is delivered as one or more batches; the final one has is_last=True.
+    """
+    path: Path
+    sha256: str
+    documents: List[str] = field(default_factory=list)
+    metadatas: List[Dict] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+    embeddings: Optional[np.ndarray] = None
+    is_last: bool = True
+    error: Optional[str] = None
+
+
+@dataclass
+class PipelineStats:
+    files: int = 0
+    chunks: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    # cosine(pooled vector, re-encoded vector) for sampled chunks in pooled mode
+    pooled_sims: List[float] = field(default_factory=list)
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"{self.files} files, {self.chunks} chunks in {elapsed:.1f}s "
+            f"({self.files / elapsed:.2f} files/s, {self.chunks / elapsed:.1f} chunks/s)"
+        )
+
+    def pooled_report(self) -> Optional[str]:
+        if not self.pooled_sims:
+            return None
+        sims = np.asarray(self.pooled_sims)
+        return (
+            f"pooled vs re-encoded cosine over {len(sims)} sampled chunks: "
+            f"mean {sims.mean():.3f}, min {sims.min():.3f}"
+        )
+
+
+def parse_file(path: Path, cache_dir: Optional[Path] = None, root: Optional[Path] = None) -> ParsedFile:
+    """
+    Stage 1 (runs in a worker process): hash + parse one raw file,
+    served from the parsed-unit cache when `cache_dir` is given and the file is unchanged.
+    With `root`, units are tagged with their root-relative path, which goes into
+    their (and their chunks') IDs.
+    Must stay a top-level function so it can be pickled to the pool.
+    """
+    try:
+        sha256 = file_sha256(path)
+        cache = UnitCache(cache_dir) if cache_dir is not None else None
+        units = load_units_cached(path, sha256, cache)
+        if root is not None:
+            source = relpath(path, root)
+            units = [replace(u, source=source, id=None) for u in units]
+        return ParsedFile(path=path, sha256=sha256, units=units)
+    except Exception as e:
+        return ParsedFile(path=path, sha256="", error=f"{type(e).__name__}: {e}")
+
+
+def chunk_units(
+    units: List[DocUnit],
+    embed_model: Embedder,
+    pooled: bool = False,
+    token_counter: Optional[TokenCounter] = None,
+):
+    """
+    Semantically chunks one file's units.
+    Returns (documents, metadatas, ids, embeddings), ready for Index.add().
+    `embeddings` is only filled in pooled mode (else None: caller encodes the chunks).
+    With a `token_counter`, each chunk's metadata gets `n_tokens` (LLM tokens of
+    its text), so prompts can be packed to a token budget without re-tokenizing.
+    """
+    documents: List[str] = []
+    metadatas: List[Dict] = []
+    ids: List[str] = []
+    vectors: List[np.ndarray] = []
+
+    chunks = semantic_chunk_units(
+        units,
+        embed_model=embed_model,
+        sim_threshold=SEM_SIM_THRESHOLD,
+        min_chars=SEM_MIN_CHARS,
+        max_chars=SEM_MAX_CHARS,
+        pool_embeddings=pooled,
+    )
+
+    seen_ids = set()
+    file_chunk_idx = 0  # index within this file
+
+    for chunk in chunks:
+        if not chunk.text.strip():
+            continue
+        # IDs are content-derived: identical text in the same unit is the same chunk
+        if chunk.chunk_id in seen_ids:
+            continue
+        seen_ids.add(chunk.chunk_id)
+
+        # augment metadata with per-file chunk index
+        meta = dict(chunk.metadata)  # copy to avoid mutating original
+        meta["chunk_idx"] = file_chunk_idx
+        file_chunk_idx += 1
+
+        documents.append(chunk.text)
+        metadatas.append(meta)
+        ids.append(chunk.chunk_id)
+        if pooled:
+            vectors.append(chunk.embedding)
+
+    if token_counter is not None:
+        for meta, n_tokens in zip(metadatas, token_counter.count_many(documents)):
+            meta["n_tokens"] = n_tokens
+
+    embeddings = np.stack(vectors) if pooled and vectors else None
+    return documents, metadatas, ids, embeddings
+
+
+class IngestPipeline:
+    """
+    Staged producer/consumer ingest:
+
+        [process pool] parse  ->  parsed_q  ->  [thread] chunk + embed  ->  embedded_q  ->  [caller] write
+
+    Parsing (pypdf, python-docx, python-pptx) is pure-Python CPU work, so it runs
+    in separate processes. Chunking and embedding share the single embedding model
+    in one thread. Writes happen on the calling thread, file by file, as results
+    arrive. Queues are bounded and large files are embedded and emitted in
+    `batch_size` slices, so memory stays flat however big the corpus (or one file) is.
+    """
+
+    def __init__(
+        self,
+        embed_model: Embedder,
+        workers: int = 1,
+        queue_size: int = 8,
+        batch_size: int = INDEX_BATCH_SIZE,
+        chunk_embed_mode: str = CHUNK_EMBED_MODE,
+        pooled_check: int = POOLED_CHECK_PER_FILE,
+        parse_cache_dir: Optional[Path] = None,
+        token_counter: Optional[TokenCounter] = None,
+        root: Optional[Path] = None,
+    ):
+        if chunk_embed_mode not in ("reencode", "pooled"):
+            raise ValueError(f"Unknown chunk_embed_mode: {chunk_embed_mode!r}")
+        self.embed_model = embed_model
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+        self.pooled = chunk_embed_mode == "pooled"
+        self.pooled_check = max(0, pooled_check)
+        self.parse_cache_dir = parse_cache_dir
+        self.token_counter = token_counter
+        self.root = root
+        self.stats = PipelineStats()
+
+    def run(
+        self,
+        paths: List[Path],
+        on_batch: Callable[[EmbeddedBatch], None],
+        on_error: Optional[Callable[[Path], None]] = None,
+    ):
+        """
+        Processes `paths` and calls `on_batch` (on this thread) for each embedded batch.
+        Batches of one file arrive in order; files arrive in completion order.
+        Failed files are reported, passed to `on_error` and skipped.
+        """
+        self.stats = PipelineStats()
+        if not paths:
+            return self.stats
+
+        parsed_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        embedded_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+
+        parser = threading.Thread(target=self._parse_stage, args=(paths, parsed_q), daemon=True)
+        embedder = threading.Thread(target=self._embed_stage, args=(parsed_q, embedded_q), daemon=True)
+        parser.start()
+        embedder.start()
+
+        while True:
+            item = embedded_q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+
+            if item.error:
+                self.stats.failed += 1
+                print(f"[ERROR] {item.path}: {item.error}")
+                if on_error is not None:
+                    on_error(item.path)
+                continue
+
+            on_batch(item)
+            self.stats.chunks += len(item.ids)
+            if item.is_last:
+                self.stats.files += 1
+                print(f"  [{self.stats.files}/{len(paths)}] {self.stats.report()}")
+
+        parser.join()
+        embedder.join()
+        return self.stats
+
+    def _parse_stage(self, paths: List[Path], out_q: "queue.Queue"):
+        try:
+            if self.workers == 1:
+                for path in paths:
+                    out_q.put(parse_file(path, self.parse_cache_dir, self.root))
+                return
+
+            # spawn, not fork: the parent already holds torch threads / CUDA state
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as pool:
+                # Keep a bounded number of files in flight; emit in completion order
+                pending: List[Future] = []
+                it = iter(paths)
+                for path in it:
+                    pending.append(pool.submit(parse_file, path, self.parse_cache_dir, self.root))
+                    if len(pending) >= 2 * self.workers:
+                        break
+
+                while pending:
+                    done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                    pending = list(not_done)
+                    for fut in done:
+                        out_q.put(fut.result())
+                        nxt = next(it, None)
+                        if nxt is not None:
+                            pending.append(pool.submit(parse_file, nxt, self.parse_cache_dir, self.root))
+        except BaseException as e:
+            out_q.put(e)
+        finally:
+            out_q.put(_DONE)
+
+    def _embed_stage(self, in_q: "queue.Queue", out_q: "queue.Queue"):
+        try:
+            while True:
+                parsed = in_q.get()
+                if parsed is _DONE:
+                    break
+                if isinstance(parsed, BaseException):
+                    out_q.put(parsed)
+                    break
+                for batch in self._chunk_and_embed(parsed):
+                    out_q.put(batch)
+        except BaseException as e:
+            out_q.put(e)
+        finally:
+            out_q.put(_DONE)
+
+    def _chunk_and_embed(self, parsed: ParsedFile) -> Iterator[EmbeddedBatch]:
+        if parsed.error:
+            yield EmbeddedBatch(path=parsed.path, sha256=parsed.sha256, error=parsed.error)
+            return
+
+        if not parsed.units:
+            print(f"Skipping empty: {parsed.path}")
+            yield EmbeddedBatch(path=parsed.path, sha256=parsed.sha256)
+            return
+
+        try:
+            documents, metadatas, ids, pooled = chunk_units(
+                parsed.units, self.embed_model, self.pooled, self.token_counter
+            )
+            if pooled is not None and self.pooled_check:
+                self._check_pooled(documents, pooled)
+        except Exception as e:
+            yield EmbeddedBatch(path=parsed.path, sha256=parsed.sha256, error=f"{type(e).__name__}: {e}")
+            return
+
+        if not documents:
+            yield EmbeddedBatch(path=parsed.path, sha256=parsed.sha256)
+            return
+
+        for start in range(0, len(documents), self.batch_size):
+            end = start + self.batch_size
+            try:
+                if pooled is not None:
+                    embeddings = pooled[start:end]
+                else:
+                    embeddings = self.embed_model.embed(documents[start:end])
+            except Exception as e:
+                yield EmbeddedBatch(path=parsed.path, sha256=parsed.sha256, error=f"{type(e).__name__}: {e}")
+                return
+            yield EmbeddedBatch(
+                path=parsed.path,
+                sha256=parsed.sha256,
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end],
+                embeddings=embeddings,
+                is_last=end >= len(documents),
+            )
+
+    def _check_pooled(self, documents: List[str], pooled: np.ndarray):
+        """
+        Quality check for pooled mode: re-encode a few evenly spaced chunks
+        and record how close the pooled vectors are to the real ones.
+        """
+        n = min(self.pooled_check, len(documents))
+        picks = np.linspace(0, len(documents) - 1, n).astype(int)
+        encoded = self.embed_model.embed([documents[i] for i in picks])
+        encoded = encoded / (np.linalg.norm(encoded, axis=1, keepdims=True) + 1e-8)
+        self.stats.pooled_sims.extend(np.einsum("ij,ij->i", encoded, pooled[picks]).tolist())
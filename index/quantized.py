@@ -0,0 +1,262 @@
+# index/quantized.py
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from index.flat import FlatIndex, SCAN_BLOCK_ROWS, _apply_mask, _normalize
+from config import FLAT_INDEX_DIR, FLAT_INDEX_DTYPE, QUANT_RESCORE_K
+
+# popcount of every byte value, for Hamming distance on packed bits (NumPy < 2.0)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_bitwise_count = getattr(np, "bitwise_count", lambda x: _POPCOUNT[x])
+
+
+def quantize_int8(vecs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8: codes = round(v * 127 / max|v|).
+    Returns (codes, inverse scales); v ≈ codes * inv_scale.
+    """
+    peak = np.abs(vecs).max(axis=1, keepdims=True)
+    peak = np.clip(peak, 1e-12, None)
+    codes = np.round(vecs * (127.0 / peak)).astype(np.int8)
+    return codes, (peak[:, 0] / 127.0).astype(np.float32)
+
+
+def quantize_binary(vecs: np.ndarray) -> np.ndarray:
+    """Sign bits, packed 8 per byte (dim/8 bytes per vector)."""
+    return np.packbits(vecs > 0, axis=1)
+
+
+class QuantizedFlatIndex(FlatIndex):
+    """
+    FlatIndex plus a compact quantized copy of every vector, searched in two stages:
+
+      1. coarse: scan the quantized codes of the whole collection
+           "int8"   => int8 dot products (4x smaller than float32)
+           "binary" => Hamming distance on sign bits (32x smaller)
+      2. exact: re-score only the best `rescore_k` candidates with the
+         full-precision rows, which stay memory-mapped on disk and are
+         paged in on demand for just those rows.
+
+    Resident memory for a scan is the codes, not the vectors. Sign bits are
+    much coarser than int8, so "binary" usually wants a larger rescore_k; use
+    recall_check() to compare its top-k against the exact full scan.
+    Extra files: codes.int8 + scales.f32, or codes.bin.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = "notes",
+        root: Path = FLAT_INDEX_DIR,
+        dtype: str = FLAT_INDEX_DTYPE,
+        mode: str = "int8",
+        rescore_k: int = QUANT_RESCORE_K,
+    ):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode: {mode!r}")
+        self.mode = mode
+        self.rescore_k = rescore_k
+        super().__init__(collection_name, root=root, dtype=dtype)
+        self._ensure_codes()
+
+    # ── FlatIndex hooks ────────────────────────────────────────────
+
+    def _empty_like(self, collection_name: str, root: Path) -> "QuantizedFlatIndex":
+        return QuantizedFlatIndex(
+            collection_name, root=root, dtype=self.dtype.name, mode=self.mode, rescore_k=self.rescore_k
+        )
+
+    def _append_extra(self, vecs: np.ndarray):
+        if self.mode == "int8":
+            codes, scales = quantize_int8(vecs)
+            with open(self._path("codes.int8"), "ab") as f:
+                f.write(codes.tobytes())
+            with open(self._path("scales.f32"), "ab") as f:
+                f.write(scales.tobytes())
+        else:
+            with open(self._path("codes.bin"), "ab") as f:
+                f.write(quantize_binary(vecs).tobytes())
+
+    def _extra_sizes(self) -> Dict[str, int]:
+        if self.mode == "int8":
+            return {"codes.int8": self.n_rows * self.dim, "scales.f32": self.n_rows * 4}
+        return {"codes.bin": self.n_rows * self._packed_dim()}
+
+    def _drop_maps(self):
+        super()._drop_maps()
+        self._code_map = self._scale_map = None
+
+    # ── search ─────────────────────────────────────────────────────
+
+    def _search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        row_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        q = _normalize(queries)
+        with self._lock:
+            self._refresh()
+            n = self.n_rows
+            if n == 0 or top_k <= 0:
+                empty = np.zeros((len(q), 0))
+                return empty.astype(np.int64), empty.astype(np.float32)
+            vecs = self._vectors()
+            codes = self._codes()
+            scales = self._scales() if self.mode == "int8" else None
+            allowed = self._alive().astype(bool)
+
+        _apply_mask(allowed, row_mask)
+        k = min(top_k, n)
+        depth = min(max(self.rescore_k, k), n)
+
+        # Stage 1: coarse candidates from the codes
+        cand_r, cand_s = self._coarse(q, codes, scales, allowed, depth)
+
+        # Stage 2: exact re-score of the candidates with full-precision rows
+        out_r = np.zeros((len(q), k), dtype=np.int64)
+        out_s = np.full((len(q), k), -np.inf, dtype=np.float32)
+        for i in range(len(q)):
+            rows = cand_r[i][cand_s[i] > -np.inf]
+            if not len(rows):
+                continue
+            rows = np.sort(rows)  # sequential page access
+            exact = np.asarray(vecs[rows], dtype=np.float32) @ q[i]
+            best = np.argsort(-exact)[:k]
+            out_r[i, :len(best)] = rows[best]
+            out_s[i, :len(best)] = exact[best]
+        return out_r, out_s
+
+    def _coarse(self, q, codes, scales, allowed, depth):
+        n = len(allowed)
+        if self.mode == "int8":
+            q_codes, q_scales = quantize_int8(q)
+            q_side = q_codes.astype(np.float32) * q_scales[:, None]
+        else:
+            q_bits = quantize_binary(q)
+
+        best_s = np.full((len(q), 0), -np.inf, dtype=np.float32)
+        best_r = np.zeros((len(q), 0), dtype=np.int64)
+
+        for start in range(0, n, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, n)
+            ok = allowed[start:end]
+            if not ok.any():
+                continue
+
+            if self.mode == "int8":
+                block = np.asarray(codes[start:end], dtype=np.float32)
+                s = (q_side @ block.T) * scales[start:end]
+            else:
+                block = np.asarray(codes[start:end])
+                s = np.empty((len(q), end - start), dtype=np.float32)
+                for i in range(len(q)):
+                    ham = _bitwise_count(np.bitwise_xor(block, q_bits[i])).sum(axis=1, dtype=np.int32)
+                    s[i] = -ham.astype(np.float32)
+            s[:, ~ok] = -np.inf
+
+            s = np.concatenate([best_s, s], axis=1)
+            r = np.concatenate([best_r, np.broadcast_to(np.arange(start, end), (len(q), end - start))], axis=1)
+            if s.shape[1] > depth:
+                part = np.argpartition(-s, depth - 1, axis=1)[:, :depth]
+                s = np.take_along_axis(s, part, axis=1)
+                r = np.take_along_axis(r, part, axis=1)
+            best_s, best_r = s, r
+
+        return best_r, best_s
+
+    # ── quality / footprint ────────────────────────────────────────
+
+    def recall_check(self, queries: np.ndarray, k: int = 5) -> float:
+        """
+        Mean recall@k of the two-stage search against the exact full scan.
+        """
+        approx, approx_s = self._search(queries, k)
+        exact, exact_s = FlatIndex._search(self, queries, k)
+        recalls = []
+        for a, a_s, e, e_s in zip(approx, approx_s, exact, exact_s):
+            truth = set(e[e_s > -np.inf].tolist())
+            if truth:
+                recalls.append(len(truth & set(a[a_s > -np.inf].tolist())) / len(truth))
+        return float(np.mean(recalls)) if recalls else 1.0
+
+    def memory_report(self) -> str:
+        full = self.n_rows * (self.dim or 0) * self.dtype.itemsize
+        coarse = sum(self._extra_sizes().values()) if self.dim else 0
+        ratio = full / coarse if coarse else 0.0
+        return (
+            f"{self.mode} codes: {coarse / 2**20:.1f} MiB scanned per query vs "
+            f"{full / 2**20:.1f} MiB of {self.dtype.name} vectors ({ratio:.1f}x smaller)"
+        )
+
+    # ── internals ──────────────────────────────────────────────────
+
+    def _packed_dim(self) -> int:
+        return (self.dim + 7) // 8
+
+    def _codes(self) -> np.ndarray:
+        if self._code_map is None:
+            if self.mode == "int8":
+                self._code_map = np.memmap(self._path("codes.int8"), dtype=np.int8, mode="r", shape=(self.n_rows, self.dim))
+            else:
+                self._code_map = np.memmap(self._path("codes.bin"), dtype=np.uint8, mode="r", shape=(self.n_rows, self._packed_dim()))
+        return self._code_map
+
+    def _scales(self) -> np.ndarray:
+        if self._scale_map is None:
+            self._scale_map = np.memmap(self._path("scales.f32"), dtype=np.float32, mode="r", shape=(self.n_rows,))
+        return self._scale_map
+
+    def _ensure_codes(self):
+        """
+        Builds the codes for an existing plain FlatIndex (or a new mode) from its vectors.
+        """
+        if not self.n_rows:
+            return
+        expected = self._extra_sizes()
+        if all(self._path(name).exists() and self._path(name).stat().st_size == size
+               for name, size in expected.items()):
+            return
+
+        print(f"Building {self.mode} codes for {self.n_rows} vectors...")
+        for name in expected:
+            self._path(name).unlink(missing_ok=True)
+        vecs = self._vectors()
+        for start in range(0, self.n_rows, SCAN_BLOCK_ROWS):
+            self._append_extra(np.asarray(vecs[start:start + SCAN_BLOCK_ROWS], dtype=np.float32))
+        self._drop_maps()
+
+
+def main():
+    """
+    Recall + footprint report on the configured collection, using a sample
+    of its own stored vectors (slightly perturbed) as queries:
+      python -m index.quantized --mode binary --k 5
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", default="notes")
+    parser.add_argument("--mode", choices=["int8", "binary"], default="int8")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rescore-k", type=int, default=QUANT_RESCORE_K)
+    args = parser.parse_args()
+
+    index = QuantizedFlatIndex(args.collection, mode=args.mode, rescore_k=args.rescore_k)
+    if not index.n_rows:
+        print("Index is empty.")
+        return
+
+    rng = np.random.default_rng(0)
+    rows = np.sort(rng.choice(index.n_rows, size=min(args.queries, index.n_rows), replace=False))
+    queries = np.asarray(index._vectors()[rows], dtype=np.float32)
+    queries += rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+
+    print(index.memory_report())
+    print(f"recall@{args.k} vs exact (rescore_k={args.rescore_k}): {index.recall_check(queries, args.k):.3f}")
+
+
+if __name__ == "__main__":
+    main()
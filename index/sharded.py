@@ -0,0 +1,126 @@
+# index/sharded.py
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.hashing import stable_id
+from core.interfaces import Index
+from core.vectors import as_matrix
+
+
+def shard_of(chunk_id: str, n_shards: int) -> int:
+    """
+    Stable shard for a chunk ID: the same chunk always lands in the same
+    shard (across processes and runs), so upserts and deletes find it.
+    """
+    return int(stable_id(chunk_id)[:8], 16) % n_shards
+
+
+class ShardedIndex(Index):
+    """
+    Partitions chunks across N child indexes by a stable hash of the chunk ID.
+
+    Writes are split per shard; query() runs every shard concurrently on a
+    thread pool (Chroma and the NumPy scans release the GIL for the heavy
+    part) and merges the per-shard top-k lists with a heap into the global
+    top-k. Items keep the child format, so StandardRetriever and everything
+    above it work unchanged.
+    """
+
+    def __init__(self, shards: List[Index], max_workers: Optional[int] = None):
+        if not shards:
+            raise ValueError("ShardedIndex needs at least one shard")
+        self.shards = shards
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or len(shards),
+            thread_name_prefix="index-shard",
+        )
+
+    # ── routing ────────────────────────────────────────────────────
+
+    def _route(self, ids: List[str]) -> Dict[int, List[int]]:
+        """shard number -> positions in `ids`"""
+        groups: Dict[int, List[int]] = {}
+        for pos, chunk_id in enumerate(ids):
+            groups.setdefault(shard_of(chunk_id, len(self.shards)), []).append(pos)
+        return groups
+
+    def _scatter(self, fn, shard_nums) -> List[Any]:
+        """Calls fn(shard_num) for each shard concurrently; results in order."""
+        futures = [self._pool.submit(fn, s) for s in shard_nums]
+        return [f.result() for f in futures]
+
+    # ── Index ──────────────────────────────────────────────────────
+
+    def add(
+        self,
+        documents: List[str],
+        embeddings: np.ndarray,
+        metadatas: List[Dict],
+        ids: List[str],
+    ):
+        if not ids:
+            raise ValueError("IDs must be provided for ShardedIndex.add(): they decide the shard")
+        vecs = as_matrix(embeddings)
+        groups = self._route(ids)
+
+        def add_to(s: int):
+            pos = groups[s]
+            self.shards[s].add(
+                documents=[documents[p] for p in pos],
+                embeddings=vecs[pos],
+                metadatas=[metadatas[p] for p in pos],
+                ids=[ids[p] for p in pos],
+            )
+
+        self._scatter(add_to, sorted(groups))
+
+    def query(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        return self.query_many(as_matrix(query_embedding), top_k, filters)[0]
+
+    def query_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        # Every shard returns its own top_k, so the global top_k is among them
+        per_shard = self._scatter(
+            lambda s: self.shards[s].query_many(query_embeddings, top_k, filters),
+            range(len(self.shards)),
+        )
+        # Scores are distances (lower = better) in every backend
+        return [
+            heapq.nsmallest(top_k, itertools.chain.from_iterable(lists), key=lambda item: item["score"])
+            for lists in zip(*per_shard)
+        ]
+
+    def get(self, ids: List[str]) -> List[Dict[str, Any]]:
+        groups = self._route(ids)
+        found = self._scatter(lambda s: self.shards[s].get([ids[p] for p in groups[s]]), sorted(groups))
+        by_id = {item["id"]: item for item in itertools.chain.from_iterable(found)}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def delete(self, ids: List[str]):
+        if not ids:
+            return
+        groups = self._route(ids)
+        self._scatter(lambda s: self.shards[s].delete([ids[p] for p in groups[s]]), sorted(groups))
+
+    def compact(self):
+        self._scatter(lambda s: self.shards[s].compact(), range(len(self.shards)))
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards)
+
+    def reset(self):
+        for shard in self.shards:
+            shard.reset()
@@ -1,31 +1,47 @@
-import hashlib
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 import chromadb
+import numpy as np
+from core.filters import to_chroma_where
 from core.interfaces import Index
+from core.vectors import as_matrix
 from config import CHROMA_DIR
 
 class ChromaIndex(Index):
-    def __init__(self, collection_name: str = "notes"):
-        self.client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    def __init__(self, collection_name: str = "notes", persist_dir: Path = CHROMA_DIR):
+        self.collection_name = collection_name
+        self.client = chromadb.PersistentClient(path=str(persist_dir))
         self.collection = self.client.get_or_create_collection(collection_name)
 
+    def count(self) -> int:
+        return self.collection.count()
+
+    def reset(self):
+        """
+        Drops and recreates the collection (used for full rebuilds).
+        """
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.get_or_create_collection(self.collection_name)
+
     def add(
         self,
         documents: List[str],
-        embeddings: List[List[float]],
+        embeddings: np.ndarray,
         metadatas: List[Dict],
         ids: List[str],
     ):
         """
         Adds documents to the index. 
-        IDs MUST be provided (we use the stable UUIDs from the Chunk objects).
+        IDs MUST be provided (we use the content-derived IDs from the Chunk objects).
+        Upserts, so re-adding a chunk after an interrupted build is harmless.
         """
         if not ids:
              raise ValueError("IDs must be provided for ChromaIndex.add()! use chunk.chunk_id")
 
-        self.collection.add(
+        # Chroma accepts NumPy arrays directly: no per-float Python objects
+        self.collection.upsert(
             documents=documents,
-            embeddings=embeddings,
+            embeddings=as_matrix(embeddings),
             metadatas=metadatas,
             ids=ids,
         )
@@ -33,22 +49,42 @@ class ChromaIndex(Index):
 
     def query(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
+        return self.query_many(as_matrix(query_embedding), top_k, filters)[0]
+
+    def query_many(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        All queries in ONE collection.query round-trip.
+        """
+        query_embeddings = as_matrix(query_embeddings)
+        if not len(query_embeddings):
+            return []
+        # Filters run inside Chroma (its metadata index), before the top_k cut
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k,
+            where=to_chroma_where(filters),
         )
-        
-        if not results["documents"] or not results["documents"][0]:
-            return []
 
-        docs = results["documents"][0]
-        metas = results["metadatas"][0]
-        ids = results["ids"][0]
-        distances = results["distances"][0]
+        if not results["documents"]:
+            return [[] for _ in range(len(query_embeddings))]
+        return [
+            self._items(docs, metas, ids, distances)
+            for docs, metas, ids, distances in zip(
+                results["documents"], results["metadatas"], results["ids"], results["distances"]
+            )
+        ]
 
+    @staticmethod
+    def _items(docs, metas, ids, distances) -> List[Dict[str, Any]]:
         retrieved_items = []
         for i in range(len(docs)):
             item = {
@@ -76,7 +112,8 @@ class ChromaIndex(Index):
         found_ids = results["ids"]
         found_docs = results["documents"]
         found_metas = results["metadatas"]
-        found_embs = results["embeddings"]
+        # one float32 matrix; each item gets a row view of it
+        found_embs = as_matrix(results["embeddings"]) if len(found_ids) else []
         
         for i in range(len(found_ids)):
             fetched.append({
@@ -86,3 +123,13 @@ class ChromaIndex(Index):
                 "embedding": found_embs[i]
             })
         return fetched
+
+    def delete(self, ids: List[str]):
+        """
+        Removes documents by ID. Unknown IDs are ignored by Chroma.
+        Used by incremental builds to drop chunks of changed/removed files.
+        """
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        print(f"Deleted {len(ids)} documents from Chroma.")
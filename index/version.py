@@ -0,0 +1,57 @@
+# index/version.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import INDEX_VERSION_PATH
+
+
+class IndexVersion:
+    """
+    Monotonic version number per collection, bumped by build_index whenever
+    it changes the index. Caches keyed on index contents (answers, results)
+    store the version they were computed at and treat other versions as stale.
+
+    current() re-reads the small JSON file only when its mtime changes,
+    so a long-running server sees a rebuild without restarting.
+    """
+
+    def __init__(self, collection_name: str = "notes", path: Path = INDEX_VERSION_PATH):
+        self.collection_name = collection_name
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._version = 0
+
+    def current(self) -> int:
+        with self._lock:
+            mtime = self.path.stat().st_mtime_ns if self.path.exists() else None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                entry = self._read().get(self.collection_name, {})
+                self._version = int(entry.get("version", 0))
+            return self._version
+
+    def bump(self) -> int:
+        """Atomic read-modify-write; returns the new version."""
+        with self._lock:
+            data = self._read()
+            version = int(data.get(self.collection_name, {}).get("version", 0)) + 1
+            data[self.collection_name] = {"version": version, "updated_at": time.time()}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._mtime = None  # force a re-read next time
+            return version
+
+    def _read(self) -> Dict:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
@@ -0,0 +1,121 @@
+# index/writer.py
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core.interfaces import Index
+from index.bm25 import BM25Index
+from index.manifest import IndexManifest
+from index.pipeline import EmbeddedBatch
+
+
+@dataclass
+class _PendingFile:
+    sha256: str
+    ids: List[str] = field(default_factory=list)
+    complete: bool = False
+
+
+class CheckpointedWriter:
+    """
+    Sits between IngestPipeline and the Index.
+
+    - Buffers incoming batches and writes them with one Index.add() per
+      `batch_size` chunks, so peak memory is bounded by the batch size,
+      not the corpus size.
+    - After each flush, every file whose chunks are now all written is
+      committed to the manifest (and the manifest saved). That is the
+      checkpoint: if the build dies, the next run skips committed files
+      and only redoes the ones that were in flight.
+    - If given a BM25Index, keeps it in step with the vector index and saves
+      it before the manifest at each checkpoint.
+    """
+
+    def __init__(
+        self,
+        index: Index,
+        manifest: IndexManifest,
+        root: Path,
+        batch_size: int,
+        lexical: Optional[BM25Index] = None,
+    ):
+        self.index = index
+        self.lexical = lexical
+        self.manifest = manifest
+        self.root = root
+        self.batch_size = max(1, batch_size)
+
+        self._buffer: List[EmbeddedBatch] = []
+        self._buffered = 0
+        self._pending: Dict[Path, _PendingFile] = {}
+        self.written = 0
+        self.committed_files = 0
+
+    def write(self, batch: EmbeddedBatch):
+        pending = self._pending.setdefault(batch.path, _PendingFile(sha256=batch.sha256))
+        pending.ids.extend(batch.ids)
+        pending.complete = batch.is_last
+
+        if batch.ids:
+            self._buffer.append(batch)
+            self._buffered += len(batch.ids)
+
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def discard(self, path: Path):
+        """
+        Drops a failed file: nothing of it is committed, so it is retried next run.
+        """
+        self._pending.pop(path, None)
+        kept = [b for b in self._buffer if b.path != path]
+        self._buffered = sum(len(b.ids) for b in kept)
+        self._buffer = kept
+
+    def flush(self):
+        if self._buffer:
+            documents: List[str] = []
+            metadatas: List[Dict] = []
+            ids: List[str] = []
+            for b in self._buffer:
+                documents.extend(b.documents)
+                metadatas.extend(b.metadatas)
+                ids.extend(b.ids)
+            embeddings = np.concatenate([b.embeddings for b in self._buffer], axis=0)
+
+            self.index.add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids,
+            )
+            if self.lexical is not None:
+                self.lexical.add(ids, documents, metadatas)
+            self.written += len(ids)
+            self._buffer, self._buffered = [], 0
+
+        self._checkpoint()
+
+    def close(self):
+        self.flush()
+
+    def _checkpoint(self):
+        done = [path for path, p in self._pending.items() if p.complete]
+        if not done:
+            return
+
+        for path in done:
+            p = self._pending.pop(path)
+            # Drop whatever the previous version of this file contributed
+            stale = set(self.manifest.chunk_ids_for(path, self.root)) - set(p.ids)
+            self.index.delete(sorted(stale))
+            if self.lexical is not None:
+                self.lexical.delete(sorted(stale))
+            self.manifest.record(path, self.root, p.ids, sha256=p.sha256)
+            self.committed_files += 1
+
+        if self.lexical is not None:
+            self.lexical.save()
+        self.manifest.save()
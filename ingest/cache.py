@@ -0,0 +1,110 @@
+# ingest/cache.py
+import os
+import pickle
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from config import PARSE_CACHE_DIR
+from core.document import DocUnit
+from core.hashing import file_sha256, stable_id
+from ingest.loaders import load_units_for_file, LOADER_VERSION
+
+_MAGIC = b"DUC1"  # DocUnit cache, format 1
+
+
+class UnitCache:
+    """
+    On-disk cache of parsed DocUnit lists.
+
+    Keyed by (file content hash, file name, LOADER_VERSION), so an edited file,
+    a renamed file or a loader change all miss automatically. Each file's units
+    live in their own small blob (zlib-compressed pickle of plain tuples), which
+    makes loading lazy: nothing is read until a file actually asks for its units.
+    """
+
+    def __init__(self, cache_dir: Path = PARSE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, path: Path, sha256: str) -> str:
+        return stable_id(sha256, Path(path).name, LOADER_VERSION)
+
+    def _blob_path(self, key: str) -> Path:
+        # two-level fan-out keeps directories small
+        return self.cache_dir / key[:2] / f"{key}.bin"
+
+    def get(self, path: Path, sha256: str) -> Optional[List[DocUnit]]:
+        blob = self._blob_path(self.key(path, sha256))
+        try:
+            raw = blob.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        if not raw.startswith(_MAGIC):
+            return None
+        try:
+            rows = pickle.loads(zlib.decompress(raw[len(_MAGIC):]))
+        except Exception:
+            # Corrupt / truncated entry: treat as a miss, it gets rewritten
+            return None
+        return [_unit_from_row(row) for row in rows]
+
+    def put(self, path: Path, sha256: str, units: List[DocUnit]):
+        blob = self._blob_path(self.key(path, sha256))
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        payload = pickle.dumps([_unit_to_row(u) for u in units], protocol=pickle.HIGHEST_PROTOCOL)
+
+        # tmp + rename: safe with several parser processes writing at once
+        tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(_MAGIC + zlib.compress(payload, 6))
+        os.replace(tmp, blob)
+
+    def prune(self, keep_keys: Iterable[str]) -> int:
+        """
+        Deletes entries whose key is not in `keep_keys`. Returns how many were removed.
+        """
+        keep = set(keep_keys)
+        removed = 0
+        for blob in self.cache_dir.glob("*/*.bin"):
+            if blob.stem not in keep:
+                blob.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def load_units_cached(
+    path: Path,
+    sha256: Optional[str] = None,
+    cache: Optional[UnitCache] = None,
+) -> List[DocUnit]:
+    """
+    Drop-in for load_units_for_file that consults / fills the cache.
+    """
+    if cache is None:
+        return load_units_for_file(path)
+
+    sha256 = sha256 or file_sha256(path)
+    units = cache.get(path, sha256)
+    if units is None:
+        units = load_units_for_file(path)
+        cache.put(path, sha256, units)
+    return units
+
+
+def _unit_to_row(u: DocUnit) -> tuple:
+    return (u.text, u.filename, u.file_type, u.page_num, u.slide_num, u.section_title, u.extra_meta, u.id)
+
+
+def _unit_from_row(row: tuple) -> DocUnit:
+    text, filename, file_type, page_num, slide_num, section_title, extra_meta, unit_id = row
+    return DocUnit(
+        text=text,
+        filename=filename,
+        file_type=file_type,
+        page_num=page_num,
+        slide_num=slide_num,
+        section_title=section_title,
+        extra_meta=extra_meta,
+        id=unit_id,
+    )
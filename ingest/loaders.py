@@ -5,6 +5,10 @@ from typing import List
 from pptx import Presentation
 from docx import Document as DocxDocument
 
+SUPPORTED_EXTENSIONS = {".pdf", ".pptx", ".docx"}
+# Bump whenever a loader's output changes; invalidates the parsed-unit cache
+LOADER_VERSION = 1
+
 def load_pdf_units(path: Path) -> List[DocUnit]:
     reader = PdfReader(str(path))
     units: List[DocUnit] = []
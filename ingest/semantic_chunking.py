@@ -1,16 +1,18 @@
 # ingest/semantic_chunking.py
-from typing import List
+from typing import List, Optional
 import numpy as np
 import re
 from core.interfaces import Chunker, Embedder
 from core.document import DocUnit, Chunk
+from config import EMBED_BATCH_SIZE
 
 class SemanticChunker(Chunker):
-    def __init__(self, embed_model: Embedder, sim_threshold, min_chars, max_chars):
+    def __init__(self, embed_model: Embedder, sim_threshold, min_chars, max_chars, pool_embeddings=False):
         self.embed_model = embed_model
         self.sim_threshold = sim_threshold
         self.min_chars = min_chars
         self.max_chars = max_chars
+        self.pool_embeddings = pool_embeddings
 
     def chunk(self, unit):
         return semantic_chunks_for_unit(
@@ -19,6 +21,7 @@ class SemanticChunker(Chunker):
             sim_threshold=self.sim_threshold,
             min_chars=self.min_chars,
             max_chars=self.max_chars,
+            pool_embeddings=self.pool_embeddings,
         )
 
 def split_into_sentences(text: str) -> List[str]:
@@ -27,84 +30,145 @@ def split_into_sentences(text: str) -> List[str]:
     return sentences
 
 
+def normalize_rows(vecs: np.ndarray) -> np.ndarray:
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / (norms + 1e-8)
+
+
+def pool_rows(normed: np.ndarray) -> np.ndarray:
+    """Mean of unit vectors, re-normalized (cosine-compatible chunk vector)."""
+    mean = normed.mean(axis=0)
+    return (mean / (np.linalg.norm(mean) + 1e-8)).astype(np.float32)
+
+
+def embed_sentences(
+    sentences: List[str],
+    embed_model: Embedder,
+    batch_size: int = EMBED_BATCH_SIZE,
+) -> np.ndarray:
+    """
+    Embeds many sentences in large, length-sorted batches.
+    Sorting by length keeps padding inside each batch minimal;
+    rows are scattered back so the output matches the input order.
+    """
+    if not sentences:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    order = np.argsort([-len(s) for s in sentences], kind="stable")
+    out: Optional[np.ndarray] = None
+
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        vecs = embed_model.embed([sentences[i] for i in idx])
+        if out is None:
+            out = np.empty((len(sentences), vecs.shape[1]), dtype=np.float32)
+        out[idx] = vecs
+
+    return out
+
+
 def semantic_chunks_for_unit(
     unit: DocUnit,
     embed_model: Embedder,
     sim_threshold: float,
     min_chars: int,
     max_chars: int,
+    sentences: Optional[List[str]] = None,
+    sent_embeddings: Optional[np.ndarray] = None,
+    pool_embeddings: bool = False,
 ) -> List[Chunk]:
-    sentences = split_into_sentences(unit.text)
+    """
+    Chunks one unit. `sentences` / `sent_embeddings` can be passed in when the
+    caller has already embedded them in bulk (see semantic_chunk_units).
+    With pool_embeddings=True each Chunk also gets `.embedding`, the normalized
+    mean of its sentence vectors, so the chunk doesn't need to be re-encoded.
+    """
+    if sentences is None:
+        sentences = split_into_sentences(unit.text)
     if not sentences:
         return []
 
-    # Interface returns List[List[float]], convert to numpy for math
-    sent_embeddings = np.array(embed_model.embed(sentences))
+    if sent_embeddings is None:
+        sent_embeddings = embed_sentences(sentences, embed_model)
+
+    # Normalize once, then every adjacent cosine similarity in one array op:
+    # sims[i-1] = cos(sentence i-1, sentence i)
+    normed = normalize_rows(sent_embeddings)
+    sims = np.einsum("ij,ij->i", normed[1:], normed[:-1]).tolist()
 
     chunks: List[Chunk] = []
-    current_sentences: List[str] = [sentences[0]]
-    current_embs: List[np.ndarray] = [sent_embeddings[0]]
+    start = 0  # first sentence of the current chunk
     current_len = len(sentences[0])
 
-    def flush_chunk():
-        nonlocal current_sentences, current_embs, current_len
-        if not current_sentences:
-            return
-
-        chunk_text = " ".join(current_sentences).strip()
+    def flush_chunk(end: int):
+        chunk_text = " ".join(sentences[start:end]).strip()
         if not chunk_text:
-            current_sentences, current_embs, current_len = [], [], 0
             return
 
         meta = unit.to_metadata()
-        chunks.append(
-            Chunk(
-                text = chunk_text,
-                metadata=meta,
-                parent_id=unit.id,
-            )
+        chunk = Chunk(
+            text = chunk_text,
+            metadata=meta,
+            parent_id=unit.id,
         )
-        current_sentences, current_embs, current_len = [], [], 0
+        if pool_embeddings:
+            chunk.embedding = pool_rows(normed[start:end])
+        chunks.append(chunk)
 
     for i in range(1, len(sentences)):
-        s = sentences[i]
-        e = sent_embeddings[i]
-        prev_e = current_embs[-1]
-
-        # cosine similarity
-        sim = float(
-            np.dot(e, prev_e) / (np.linalg.norm(e) * np.linalg.norm(prev_e) + 1e-8)
-        )
+        s_len = len(sentences[i])
 
-        hard_limit = (current_len + len(s)) > max_chars
-        topic_shift = sim < sim_threshold and current_len > min_chars
+        hard_limit = (current_len + s_len) > max_chars
+        topic_shift = sims[i - 1] < sim_threshold and current_len > min_chars
 
         if hard_limit or topic_shift:
-            flush_chunk()
+            flush_chunk(i)
+            start, current_len = i, 0
 
-        current_sentences.append(s)
-        current_embs.append(e)
-        current_len += len(s)
+        current_len += s_len
 
-    flush_chunk()
+    flush_chunk(len(sentences))
     return chunks
 
 
 def semantic_chunk_units(
     units: List[DocUnit],
-    embed_model: SentenceTransformer,
+    embed_model: Embedder,
     sim_threshold: float,
     min_chars: int,
     max_chars: int,
+    batch_size: int = EMBED_BATCH_SIZE,
+    pool_embeddings: bool = False,
 ) -> List[Chunk]:
+    """
+    Chunks many units with ONE embedding pass over all their sentences
+    (instead of one small forward pass per page / slide / section),
+    then hands each unit its slice of the vectors.
+    """
+    per_unit = [split_into_sentences(u.text) for u in units]
+    flat = [s for sents in per_unit for s in sents]
+    if not flat:
+        return []
+
+    all_embs = embed_sentences(flat, embed_model, batch_size=batch_size)
+
     all_chunks: List[Chunk] = []
-    for unit in units:
+    offset = 0
+    for unit, sentences in zip(units, per_unit):
+        n = len(sentences)
+        if n == 0:
+            continue
         unit_chunks = semantic_chunks_for_unit(
             unit,
             embed_model=embed_model,
             sim_threshold=sim_threshold,
             min_chars=min_chars,
             max_chars=max_chars,
+            sentences=sentences,
+            sent_embeddings=all_embs[offset:offset + n],
+            pool_embeddings=pool_embeddings,
         )
+        offset += n
         all_chunks.extend(unit_chunks)
     return all_chunks
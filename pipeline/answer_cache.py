@@ -0,0 +1,121 @@
+import copy
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.interfaces import Embedder
+from core.vectors import as_matrix
+from index.version import IndexVersion
+from config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_MAX_ITEMS
+
+
+class SemanticAnswerCache:
+    """
+    Reuses past answers for questions that mean the same thing.
+
+    Each entry keeps the question's normalized embedding, the chunk IDs it
+    was answered from, the answer payload, the request key (top_k, filters,
+    prompt strategy, ...) and the index version it was computed at. A new
+    question hits when an entry with the same key and the current index
+    version has cosine >= `threshold`; one matrix-vector product scores all
+    entries. Least recently used entries are evicted beyond `max_items`.
+    """
+
+    def __init__(
+        self,
+        embed_model: Embedder,
+        version: IndexVersion,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        max_items: int = ANSWER_CACHE_MAX_ITEMS,
+    ):
+        self.embed_model = embed_model
+        self.version = version
+        self.threshold = threshold
+        self.max_items = max(1, max_items)
+        self._lock = threading.Lock()
+
+        self._vecs: Optional[np.ndarray] = None  # (max_items, dim), rows [0, n) used
+        self._entries: List[Dict[str, Any]] = []
+        self._last_used = np.zeros(self.max_items, dtype=np.float64)
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # best match was computed on an older index
+
+    # ── public API ─────────────────────────────────────────────────
+
+    def embed(self, questions: List[str]) -> np.ndarray:
+        """
+        Raw question vectors from the retriever's embedder; the engine hands
+        the same vectors to the retriever so a miss doesn't encode twice.
+        """
+        return as_matrix(self.embed_model.embed(list(questions)))
+
+    @staticmethod
+    def _unit(q_vec: np.ndarray) -> np.ndarray:
+        q_vec = np.asarray(q_vec, dtype=np.float32).reshape(-1)
+        return q_vec / max(float(np.linalg.norm(q_vec)), 1e-12)
+
+    def lookup(self, q_vec: np.ndarray, key: str) -> Optional[Dict[str, Any]]:
+        """Cached answer payload (a deep copy) or None."""
+        q_vec = self._unit(q_vec)
+        version = self.version.current()
+        with self._lock:
+            n = len(self._entries)
+            if n:
+                sims = self._vecs[:n] @ q_vec
+                same_key = np.fromiter((e["key"] == key for e in self._entries), dtype=bool, count=n)
+                sims[~same_key] = -np.inf
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    entry = self._entries[best]
+                    if entry["version"] == version:
+                        self.hits += 1
+                        self._last_used[best] = time.monotonic()
+                        result = copy.deepcopy(entry["answer"])
+                        result.setdefault("debug", {})["cache"] = {
+                            "similarity": float(sims[best]),
+                            "question": entry["question"],
+                        }
+                        return result
+                    self.stale += 1
+            self.misses += 1
+            return None
+
+    def store(self, q_vec: np.ndarray, key: str, question: str, answer: Dict[str, Any], chunk_ids: List[str]):
+        q_vec = self._unit(q_vec)
+        version = self.version.current()
+        with self._lock:
+            if self._vecs is None:
+                self._vecs = np.zeros((self.max_items, len(q_vec)), dtype=np.float32)
+            entry = {
+                "key": key,
+                "question": question,
+                "chunk_ids": list(chunk_ids),
+                "answer": copy.deepcopy(answer),
+                "version": version,
+            }
+            n = len(self._entries)
+            if n < self.max_items:
+                slot = n
+                self._entries.append(entry)
+            else:
+                # Evict the least recently used (stale versions go first)
+                stale = [i for i, e in enumerate(self._entries) if e["version"] != version]
+                slot = stale[0] if stale else int(np.argmin(self._last_used))
+                self._entries[slot] = entry
+            self._vecs[slot] = q_vec
+            self._last_used[slot] = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "index_version": self.version.current(),
+        }
@@ -0,0 +1,92 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from core.interfaces import Embedder
+from core.vectors import as_matrix
+from ingest.semantic_chunking import split_into_sentences, normalize_rows
+from config import COMPRESS_TOP_SENTENCES, COMPRESS_NEIGHBOURS
+
+
+class ExtractiveCompressor:
+    """
+    Shrinks retrieved chunks to the sentences that matter for the question.
+
+    Every chunk is split with split_into_sentences (the same split semantic
+    chunking used at ingest), and the question plus all sentences go through
+    ONE embed call; cosine scores are one matrix-vector product. Sentence
+    vectors computed at ingest are already in the embedding cache (keyed by
+    text), so with EMBED_CACHE_ENABLED they are read back, not re-encoded.
+
+    Per chunk, the `top_sentences` best sentences and `neighbours` sentences
+    on each side of them are kept in their original order; skipped stretches
+    are marked with "…". Every chunk keeps at least one sentence, so source
+    numbering and citations are unchanged.
+    """
+
+    GAP = "…"
+
+    def __init__(
+        self,
+        embed_model: Embedder,
+        top_sentences: int = COMPRESS_TOP_SENTENCES,
+        neighbours: int = COMPRESS_NEIGHBOURS,
+    ):
+        self.embed_model = embed_model
+        self.top_sentences = max(1, top_sentences)
+        self.neighbours = max(0, neighbours)
+
+    def compress(
+        self,
+        question: str,
+        items: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """(items with compressed text, sentence / character counts before and after)."""
+        per_item = [split_into_sentences(it["text"]) for it in items]
+        flat = [s for sents in per_item for s in sents]
+        report = {"sentences_in": len(flat), "sentences_kept": len(flat),
+                  "chars_in": sum(len(it["text"]) for it in items)}
+        report["chars_out"] = report["chars_in"]
+        if len(flat) <= len(items):  # nothing to choose from
+            return items, report
+
+        vecs = normalize_rows(as_matrix(self.embed_model.embed([question] + flat)))
+        scores = vecs[1:] @ vecs[0]
+
+        out: List[Dict[str, Any]] = []
+        kept_total = 0
+        offset = 0
+        for item, sents in zip(items, per_item):
+            n = len(sents)
+            chunk_scores = scores[offset:offset + n]
+            offset += n
+            if n <= self.top_sentences:
+                out.append(item)
+                kept_total += n
+                continue
+
+            best = np.argpartition(-chunk_scores, self.top_sentences - 1)[:self.top_sentences]
+            keep = np.zeros(n, dtype=bool)
+            for d in range(-self.neighbours, self.neighbours + 1):
+                keep[np.clip(best + d, 0, n - 1)] = True
+            kept_total += int(keep.sum())
+            if keep.all():
+                out.append(item)
+                continue
+
+            parts, prev = [], -1
+            for i in np.flatnonzero(keep):
+                if i != prev + 1:
+                    parts.append(self.GAP)
+                parts.append(sents[i])
+                prev = i
+            if prev != n - 1:
+                parts.append(self.GAP)
+            text = " ".join(parts)
+            # the stored token count no longer applies
+            meta = {k: v for k, v in item["metadata"].items() if k != "n_tokens"}
+            out.append(dict(item, text=text, metadata=meta))
+
+        report["sentences_kept"] = kept_total
+        report["chars_out"] = sum(len(it["text"]) for it in out)
+        return out, report
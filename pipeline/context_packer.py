@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+from generation.tokens import TokenCounter
+from ingest.semantic_chunking import split_into_sentences
+from config import PROMPT_TOKEN_BUDGET
+
+
+def source_label(i: int, metadata: Dict[str, Any]) -> str:
+    label = f"Source {i}: {metadata.get('filename', 'unknown')}"
+    if metadata.get("page_num"):
+        label += f" (page {metadata['page_num']})"
+    if metadata.get("slide_num"):
+        label += f" (slide {metadata['slide_num']})"
+    if metadata.get("section_title"):
+        label += f" – {metadata['section_title']}"
+    return f"[{label}]"
+
+
+def source_block(i: int, item: Dict[str, Any]) -> str:
+    """How retrieved item number `i` (1-based) appears in the prompt context."""
+    return f"{source_label(i, item['metadata'])}\n{item['text']}"
+
+
+class ContextPacker:
+    """
+    Fits retrieved chunks into a prompt token budget instead of letting the
+    tokenizer cut the end of the prompt (where QUESTION / FINAL ANSWER sit).
+
+    Cost = template with the question and an empty context, plus, per chunk,
+    its label and its text. Text costs come from the `n_tokens` stored in the
+    chunk metadata at index time (counted here when missing). Chunks are
+    taken in rank order; the first one that does not fit is cut back to the
+    sentences that do, and everything after it is dropped. Token counts of
+    concatenated pieces are treated as additive, which is exact up to a few
+    tokens at the joins; the generator's hard truncation stays as a backstop.
+    When not even one sentence fits, nothing is kept and the report says
+    `over_budget`; the engine then answers without calling the LLM.
+    """
+
+    SEPARATOR_TOKENS = 1  # "\n\n" between blocks
+
+    def __init__(self, counter: TokenCounter, budget: int = PROMPT_TOKEN_BUDGET):
+        self.counter = counter
+        self.budget = budget
+
+    def pack(
+        self,
+        question: str,
+        items: List[Dict[str, Any]],
+        prompt_strategy: Callable[[str, str], str],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """(items to put in the prompt, report of what was kept / trimmed / dropped)."""
+        template = self.counter.count(prompt_strategy(context="", question=question).strip()) + 1  # + BOS
+        remaining = self.budget - template
+
+        kept: List[Dict[str, Any]] = []
+        trimmed = None
+        for item in items:
+            label = self.counter.count(source_label(len(kept) + 1, item["metadata"])) + 1  # + newline
+            cost = label + self._text_tokens(item) + self.SEPARATOR_TOKENS
+            if cost <= remaining:
+                kept.append(item)
+                remaining -= cost
+                continue
+
+            part = self._trim(item, remaining - label - self.SEPARATOR_TOKENS)
+            if part is not None:
+                kept.append(part)
+                remaining -= label + part["metadata"]["n_tokens"] + self.SEPARATOR_TOKENS
+                trimmed = item["id"]
+            break
+
+        dropped = [it["id"] for it in items[len(kept):]]
+
+        prompt_tokens = self.budget - remaining
+        return kept, {
+            "budget": self.budget,
+            "template_tokens": template,
+            "prompt_tokens": prompt_tokens,
+            "over_budget": not kept or prompt_tokens > self.budget,
+            "kept": [it["id"] for it in kept],
+            "trimmed": trimmed,
+            "dropped": dropped,
+        }
+
+    def _text_tokens(self, item: Dict[str, Any]) -> int:
+        n = item["metadata"].get("n_tokens")
+        return int(n) if n is not None else self.counter.count(item["text"])
+
+    def _trim(self, item: Dict[str, Any], available: int):
+        """Copy of `item` holding the leading sentences that fit, or None."""
+        if available <= 0:
+            return None
+        sentences = split_into_sentences(item["text"])
+        used, keep = 0, 0
+        for cost in self.counter.count_many(sentences):
+            if used + cost > available:
+                break
+            used += cost
+            keep += 1
+        if not keep:
+            return None
+        meta = dict(item["metadata"], n_tokens=used)
+        return dict(item, text=" ".join(sentences[:keep]), metadata=meta)
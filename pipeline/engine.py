@@ -1,26 +1,125 @@
-from typing import Optional, Callable, List, Dict, Any, Tuple
+import json
+
+import numpy as np
+from typing import Optional, Callable, Iterator, List, Dict, Any, Tuple, TYPE_CHECKING
 from prompts.zero_shot import zero_shot_prompt
 from prompts.one_shot import one_shot_prompt
 from prompts.few_shot import few_shot_prompt    
 from prompts.base import build_base_prompt
+from core.hashing import stable_id
 from core.interfaces import Retriever, Generator
-from config import TOP_K
+from pipeline.answer_cache import SemanticAnswerCache
+from pipeline.exact_cache import ExactCache, normalize_question
+from pipeline.context_packer import ContextPacker, source_block
+from pipeline.compressor import ExtractiveCompressor
+from config import TOP_K, RERANK_DEPTH
+
+if TYPE_CHECKING:  # the cross-encoder model is only loaded when a reranker is built
+    from retrieval.rerank import CrossEncoderReranker
 
 class RAGEngine:
-    def __init__(self, retriever: Retriever, generator: Generator):
+    def __init__(
+        self,
+        retriever: Retriever,
+        generator: Generator,
+        reranker: Optional["CrossEncoderReranker"] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        exact_cache: Optional[ExactCache] = None,
+        packer: Optional[ContextPacker] = None,
+        compressor: Optional[ExtractiveCompressor] = None,
+    ):
         """
         Initializes the RAGEngine with a retriever and a generator.
         This is Dependency Injection: we pass the components in,
         rather than creating them inside.
+        An optional reranker narrows an over-fetched candidate list down to top_k.
+        An optional answer_cache serves paraphrases of past questions without
+        retrieval or generation; an optional exact_cache serves repeated
+        identical requests (retrieval results and answers).
+        An optional compressor cuts retrieved chunks down to their most relevant
+        sentences; an optional packer then fits them into a prompt token budget.
         """
         self.retriever = retriever
         self.generator = generator
+        self.reranker = reranker
+        self.answer_cache = answer_cache
+        self.exact_cache = exact_cache
+        self.packer = packer
+        self.compressor = compressor
 
-    def retrieve(self, q: str, top_k: int = TOP_K) -> List[Dict[str, Any]]:
+    def retrieve(
+        self,
+        q: str,
+        top_k: int = TOP_K,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Delegates retrieval to the injected retriever instance.
+        With a reranker: fetches `rerank_depth` candidates (default RERANK_DEPTH)
+        and keeps the `top_k` the cross-encoder scores highest.
+        `filters` (canonical, see core.filters) restricts the search to matching chunks.
+        `query_embedding`, if already computed, spares the retriever encoding `q`.
+        """
+        exact = self.exact_cache
+        if exact is not None:
+            key = exact.make_key("retrieve", normalize_question(q), top_k, rerank_depth, _filters_key(filters))
+            cached = exact.get(key)
+            if cached is not None:
+                return cached
+
+        if self.reranker is None:
+            results = self.retriever.retrieve(q, top_k, filters, query_embedding)
+        else:
+            depth = max(top_k, rerank_depth or RERANK_DEPTH)
+            candidates = self.retriever.retrieve(q, depth, filters, query_embedding)
+            results = self.reranker.rerank(q, candidates, top_k)
+
+        if exact is not None:
+            exact.put(key, results)
+        return results
+
+    def retrieve_many(
+        self,
+        questions: List[str],
+        top_k: int = TOP_K,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Bulk retrieve(): one retriever.retrieve_many call (one encoder batch,
+        one multi-query index call) for all questions, then per-question rerank.
+        Questions found in the exact cache are left out of the batch.
         """
-        return self.retriever.retrieve(q, top_k)
+        questions = list(questions)
+        outputs: List[Optional[List[Dict[str, Any]]]] = [None] * len(questions)
+        exact = self.exact_cache
+        if exact is not None:
+            keys = [
+                exact.make_key("retrieve", normalize_question(q), top_k, rerank_depth, _filters_key(filters))
+                for q in questions
+            ]
+            outputs = [exact.get(k) for k in keys]
+
+        todo = [i for i, out in enumerate(outputs) if out is None]
+        todo_questions = [questions[i] for i in todo]
+        todo_embs = None
+        if query_embeddings is not None and todo:
+            todo_embs = np.stack([query_embeddings[i] for i in todo])
+        if self.reranker is None:
+            batches = self.retriever.retrieve_many(todo_questions, top_k, filters, todo_embs) if todo else []
+        else:
+            depth = max(top_k, rerank_depth or RERANK_DEPTH)
+            batches = self.retriever.retrieve_many(todo_questions, depth, filters, todo_embs) if todo else []
+            batches = [self.reranker.rerank(q, c, top_k) for q, c in zip(todo_questions, batches)]
+
+        for i, results in zip(todo, batches):
+            outputs[i] = results
+            if exact is not None:
+                exact.put(keys[i], results)
+        return outputs
 
     def build_prompt(
         self,
@@ -33,20 +132,8 @@ class RAGEngine:
 
     prompt_strategy: function(context: str, question: str) -> str
     """
-        ctx_blocks = []
         # retrieved_items is a list of dicts: {"text": ..., "metadata": ...}
-        for i, item in enumerate(retrieved_items, start=1):
-            text = item["text"]
-            m = item["metadata"]
-            
-            label = f"Source {i}: {m.get('filename', 'unknown')}"
-            if m.get("page_num"):
-                label += f" (page {m['page_num']})"
-            if m.get("slide_num"):
-                label += f" (slide {m['slide_num']})"
-            if m.get("section_title"):
-                label += f" – {m['section_title']}"
-            ctx_blocks.append(f"[{label}]\n{text}")
+        ctx_blocks = [source_block(i, item) for i, item in enumerate(retrieved_items, start=1)]
 
         context = "\n\n".join(ctx_blocks)
         prompt = prompt_strategy(
@@ -75,23 +162,210 @@ class RAGEngine:
         question: str,
         top_k: int = TOP_K,
         max_new_tokens: int = 512,
-        prompt_strategy: Optional[Callable[[str, str], str]] = None
+        prompt_strategy: Optional[Callable[[str, str], str]] = None,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        key = self._cache_key(top_k, max_new_tokens, prompt_strategy, rerank_depth, filters)
+
+        # 1. identical request (normalized question + settings + index version)
+        exact = self.exact_cache
+        if exact is not None:
+            exact_key = exact.make_key("answer", normalize_question(question), key)
+            cached = exact.get(exact_key)
+            if cached is not None:
+                return cached
+
+        # 2. paraphrase of an earlier question
+        cache = self.answer_cache
+        if cache is not None:
+            q_vec = cache.embed([question])[0]
+            cached = cache.lookup(q_vec, key)
+            if cached is not None:
+                return cached
+
+        results = self.retrieve(
+            question, top_k=top_k, rerank_depth=rerank_depth, filters=filters,
+            query_embedding=q_vec if cache is not None else None,
+        )
+        out = self._answer_from(question, results, max_new_tokens, prompt_strategy, filters)
+        if cache is not None:
+            cache.store(q_vec, key, question, out, [r["id"] for r in results])
+        if exact is not None:
+            exact.put(exact_key, out)
+        return out
+
+    def answer_many(
+        self,
+        questions: List[str],
+        top_k: int = TOP_K,
+        max_new_tokens: int = 512,
+        prompt_strategy: Optional[Callable[[str, str], str]] = None,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Bulk answer(): retrieval for all questions in one batch (retrieve_many),
+        then one generator.generate_many call for all prompts.
+        """
+        questions = list(questions)
+        outputs: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        key = self._cache_key(top_k, max_new_tokens, prompt_strategy, rerank_depth, filters)
+
+        exact = self.exact_cache
+        if exact is not None:
+            exact_keys = [exact.make_key("answer", normalize_question(q), key) for q in questions]
+            outputs = [exact.get(k) for k in exact_keys]
+
+        cache = self.answer_cache
+        if cache is not None:
+            pending = [i for i, out in enumerate(outputs) if out is None]
+            q_vecs = cache.embed([questions[i] for i in pending]) if pending else []
+            vec_of = dict(zip(pending, q_vecs))
+            for i in pending:
+                outputs[i] = cache.lookup(vec_of[i], key)
+
+        todo = [i for i, out in enumerate(outputs) if out is None]
+        batches = self.retrieve_many(
+            [questions[i] for i in todo], top_k=top_k, rerank_depth=rerank_depth, filters=filters,
+            query_embeddings=np.stack([vec_of[i] for i in todo]) if cache is not None and todo else None,
+        )
+        prepared = [
+            self._prepare(questions[i], results, prompt_strategy, filters)
+            for i, results in zip(todo, batches)
+        ]
+        # one batched generate call for every question that needs the LLM
+        gen = [j for j, (_, prompt) in enumerate(prepared) if prompt is not None]
+        texts = self.generator.generate_many(
+            [prepared[j][1] for j in gen], max_new_tokens=max_new_tokens, temperature=0.6
+        ) if gen else []
+        for j, text in zip(gen, texts):
+            prepared[j][0]["answer"] = text
+
+        for (i, results), (out, _) in zip(zip(todo, batches), prepared):
+            outputs[i] = out
+            if cache is not None:
+                cache.store(vec_of[i], key, questions[i], outputs[i], [r["id"] for r in results])
+            if exact is not None:
+                exact.put(exact_keys[i], outputs[i])
+        return outputs
+
+    def answer_stream(
+        self,
+        question: str,
+        top_k: int = TOP_K,
+        max_new_tokens: int = 512,
+        prompt_strategy: Optional[Callable[[str, str], str]] = None,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming answer(): yields events as they become available:
+            {"type": "sources", "sources": [...], "debug": {...}}  (once, first)
+            {"type": "token", "text": "..."}                         (0..n)
+            {"type": "done", "answer": "<full answer>"}             (once, last)
+        Cache hits and the no-result / off-topic replies come as a single
+        token event. The finished answer is stored in both caches, same as answer().
+        """
+        key = self._cache_key(top_k, max_new_tokens, prompt_strategy, rerank_depth, filters)
+
+        cached = None
+        exact = self.exact_cache
+        if exact is not None:
+            exact_key = exact.make_key("answer", normalize_question(question), key)
+            cached = exact.get(exact_key)
+
+        cache = self.answer_cache
+        if cached is None and cache is not None:
+            q_vec = cache.embed([question])[0]
+            cached = cache.lookup(q_vec, key)
+
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"], "debug": cached.get("debug", {})}
+            yield {"type": "token", "text": cached["answer"]}
+            yield {"type": "done", "answer": cached["answer"]}
+            return
+
+        results = self.retrieve(
+            question, top_k=top_k, rerank_depth=rerank_depth, filters=filters,
+            query_embedding=q_vec if cache is not None else None,
+        )
+        out, prompt = self._prepare(question, results, prompt_strategy, filters)
+        yield {"type": "sources", "sources": out["sources"], "debug": out["debug"]}
+
+        if prompt is None:
+            yield {"type": "token", "text": out["answer"]}
+        else:
+            pieces = []
+            for piece in self.generator.generate_stream(
+                prompt,
+                max_new_tokens=max_new_tokens,
+                temperature=0.6,
+            ):
+                pieces.append(piece)
+                yield {"type": "token", "text": piece}
+            out["answer"] = "".join(pieces).strip()
+
+        # only a fully generated answer gets here (a dropped client stops the generator early)
+        if cache is not None:
+            cache.store(q_vec, key, question, out, [r["id"] for r in results])
+        if exact is not None:
+            exact.put(exact_key, out)
+        yield {"type": "done", "answer": out["answer"]}
+
+    @staticmethod
+    def _cache_key(top_k, max_new_tokens, prompt_strategy, rerank_depth, filters) -> str:
+        """Everything besides the question that shapes an answer."""
+        strategy = getattr(prompt_strategy or build_base_prompt, "__qualname__", repr(prompt_strategy))
+        return stable_id(top_k, max_new_tokens, strategy, rerank_depth, _filters_key(filters))
+
+    def _answer_from(
+        self,
+        question: str,
+        results: List[Dict[str, Any]],
+        max_new_tokens: int,
+        prompt_strategy: Optional[Callable[[str, str], str]],
+        filters: Optional[Dict[str, Any]],
     ) -> Dict[str, Any]:
+        out, prompt = self._prepare(question, results, prompt_strategy, filters)
+        if prompt is not None:
+            # Generator interface call
+            out["answer"] = self.generator.generate(
+                prompt,
+                max_new_tokens=max_new_tokens,
+                temperature=0.6,
+            )
+        return out
+
+    def _prepare(
+        self,
+        question: str,
+        results: List[Dict[str, Any]],
+        prompt_strategy: Optional[Callable[[str, str], str]],
+        filters: Optional[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        (answer payload without the generated text, prompt), or
+        (final payload, None) when there is nothing to generate from.
+        """
         if prompt_strategy is None:
             prompt_strategy = build_base_prompt
 
-        results = self.retrieve(question, top_k=top_k)
-
         if not results:
             return {
-                "answer": "I couldn't find anything at all in the indexed notes.",
+                "answer": (
+                    "No indexed notes match the selected filters."
+                    if filters else
+                    "I couldn't find anything at all in the indexed notes."
+                ),
                 "sources": [],
                 "debug": {"distances": []},
-            }
+            }, None
 
         # Simple "confidence" check: if best score (distance) is too large, bail out
         # Note: StandardRetriever returns 'score' which is distance in Chroma (lower is better)
-        best_dist = results[0]["score"]
+        # (after reranking the closest chunk need not come first)
+        best_dist = min(r["score"] for r in results)
         THRESHOLD = 2.0 
 
         if best_dist > THRESHOLD:
@@ -99,17 +373,23 @@ class RAGEngine:
                 "answer": "I cannot answer this from the notes. It seems unrelated to the indexed material.",
                 "sources": [],
                 "debug": {"distances": [r["score"] for r in results]},
-            }
+            }, None
+
+        debug = {"distances": [r["score"] for r in results]}
+        if self.compressor is not None:
+            results, debug["compression"] = self.compressor.compress(question, results)
+        if self.packer is not None:
+            results, debug["packing"] = self.packer.pack(question, results, prompt_strategy)
+            if not results:
+                # the template + question leave no room for even one sentence of context
+                return {
+                    "answer": "I cannot answer this from the notes: the question is too long for the prompt budget.",
+                    "sources": [],
+                    "debug": debug,
+                }, None
 
         prompt = self.build_prompt(question, results, prompt_strategy=prompt_strategy)
-        
-        # Generator interface call
-        ans_text = self.generator.generate(
-            prompt,
-            max_new_tokens=max_new_tokens,
-            temperature=0.6,
-        )
-        
+
         sources = []
         for i, item in enumerate(results, start=1):
             m = item["metadata"]
@@ -124,7 +404,11 @@ class RAGEngine:
             )
 
         return {
-            "answer": ans_text,
+            "answer": "",
             "sources": sources,
-            "debug": {"distances": [r["score"] for r in results]},
-        }
+            "debug": debug,
+        }, prompt
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(filters, sort_keys=True)
@@ -0,0 +1,178 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+import config
+from core.hashing import stable_id
+from index.version import IndexVersion
+from prompts.registry import static_prefixes
+from config import EXACT_CACHE_MAX_ITEMS, EXACT_CACHE_TTL_S
+
+# Server settings that change what a request returns without changing the
+# index (the index itself is covered by IndexVersion)
+FINGERPRINT_SETTINGS = (
+    "EMBED_MODEL_NAME",
+    "EMBED_BACKEND",
+    "RETRIEVAL_MODE",
+    "HYBRID_CANDIDATES",
+    "RRF_K",
+    "MMR_ENABLED",
+    "MMR_FETCH_K",
+    "MMR_LAMBDA",
+    "RERANK_ENABLED",
+    "RERANK_MODEL_NAME",
+    "RERANK_DEPTH",
+    "LLAMA_MODEL_NAME",
+    "LLM_MAX_PROMPT_TOKENS",
+    "CONTEXT_PACKING_ENABLED",
+    "PROMPT_TOKEN_BUDGET",
+    "COMPRESSION_ENABLED",
+    "COMPRESS_TOP_SENTENCES",
+    "COMPRESS_NEIGHBOURS",
+)
+
+
+def settings_fingerprint() -> str:
+    """Hash of the retrieval / generation settings and every prompt template."""
+    settings = {name: getattr(config, name) for name in FINGERPRINT_SETTINGS}
+    return stable_id(json.dumps(settings, sort_keys=True, default=str), *static_prefixes())
+
+
+def normalize_question(question: str) -> str:
+    """Case, surrounding/inner whitespace and trailing ?!. do not change the request."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+class ExactCache:
+    """
+    Deterministic request -> result cache (retrieval results, answers).
+
+    Bounded in memory (LRU, `max_items`) and by age (`ttl_s`). Keys come from
+    make_key(), which folds in the current index version and `fingerprint`
+    (settings_fingerprint() by default): after build_index bumps the version,
+    or the settings / prompt templates change, old entries can no longer be hit.
+
+    With `path`, every put is appended to a JSON-lines log and the log is
+    replayed on start, so a restarted server keeps its warm cache; the log is
+    rewritten without dead entries when it grows past twice the live set.
+    Its first line records the fingerprint; a log written under another one
+    is discarded on start.
+    """
+
+    def __init__(
+        self,
+        version: IndexVersion,
+        max_items: int = EXACT_CACHE_MAX_ITEMS,
+        ttl_s: float = EXACT_CACHE_TTL_S,
+        path: Optional[Path] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        self.version = version
+        self.fingerprint = fingerprint if fingerprint is not None else settings_fingerprint()
+        self.max_items = max(1, max_items)
+        self.ttl_s = ttl_s
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        if self.path is not None:
+            self._replay()
+
+    def make_key(self, *parts: Any) -> str:
+        return stable_id(self.version.current(), self.fingerprint, *parts)
+
+    def get(self, key: str) -> Optional[Any]:
+        """A deep copy of the cached value, or None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._items[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_s
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            if self.path is not None:
+                line = json.dumps({"k": key, "e": expires_at, "v": value}, default=float, ensure_ascii=False)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._log_lines += 1
+                if self._log_lines > 2 * self.max_items:
+                    self._rewrite()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._items),
+        }
+
+    # ── persistence ────────────────────────────────────────────────
+
+    def _replay(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._log_lines = 0
+        if self.path.exists() and not self._same_fingerprint():
+            self.path.unlink()  # written under other settings: nothing in it can hit
+        if self.path.exists():
+            now = time.time()
+            with open(self.path, "r", encoding="utf-8") as f:
+                next(f, None)  # fingerprint header
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of a killed process
+                    if rec["e"] < now:
+                        self._items.pop(rec["k"], None)
+                        continue
+                    self._items[rec["k"]] = (rec["e"], rec["v"])
+                    self._items.move_to_end(rec["k"])
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        if not self.path.exists() or self._log_lines > 2 * max(len(self._items), 1):
+            self._rewrite()
+
+    def _same_fingerprint(self) -> bool:
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                return json.loads(f.readline()).get("fingerprint") == self.fingerprint
+            except (ValueError, AttributeError):
+                return False
+
+    def _rewrite(self):
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"fingerprint": self.fingerprint}) + "\n")
+            for key, (expires_at, value) in self._items.items():
+                f.write(json.dumps({"k": key, "e": expires_at, "v": value}, default=float, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._log_lines = len(self._items)
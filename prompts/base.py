@@ -1,8 +1,10 @@
-def build_base_prompt(
-    context: str,
-    question: str,
-) -> str:
-    return f"""
+def prompt_prefix(strategy: str = "") -> str:
+    """
+    The fixed head of every prompt: role, rules and the strategy's
+    instructions/examples. It does not depend on the request, so the LLM can
+    keep its KV cache and only prefill what build_base_prompt appends.
+    """
+    prefix = """
 SYSTEM ROLE:
 You are an exam tutor. Answer questions ONLY using the provided sources.
 
@@ -15,9 +17,18 @@ STRICT RULES:
 - When the question asks for "types", explicitly list and briefly explain each type using the sources.
 - If the answer is not present in the sources, reply EXACTLY with:
 "I cannot answer this from the notes."
+""".strip()
+    if strategy.strip():
+        prefix += f"\n\nANSWER GUIDE:\n{strategy.strip()}"
+    return prefix + "\n\n\n"
 
 
-SOURCES (read-only):
+def build_base_prompt(
+    context: str,
+    question: str,
+    strategy: str = "",
+) -> str:
+    return prompt_prefix(strategy) + f"""SOURCES (read-only):
 <<<
 {context}
 >>>
@@ -25,5 +36,4 @@ SOURCES (read-only):
 QUESTION:
 {question}
 
-FINAL ANSWER:
-""".strip()
+FINAL ANSWER:"""
@@ -1,7 +1,6 @@
 from prompts.base import build_base_prompt
 
-def cot_prompt(context: str, question: str) -> str:
-    strategy = """
+STRATEGY = """
 Use step-by-step reasoning based only on the provided information to derive the answer.
 
 Provide the response in this structure:
@@ -32,4 +31,7 @@ Final division: 1 / 0.19 ≈ 5.26.
 Final Answer:
 With 10 processors, the theoretical speedup is approximately 5.26×.
 """
-    return build_base_prompt(context, question, strategy)
+
+
+def cot_prompt(context: str, question: str) -> str:
+    return build_base_prompt(context, question, STRATEGY)
@@ -1,7 +1,6 @@
 from prompts.base import build_base_prompt
 
-def one_shot_prompt(context: str, question: str) -> str:
-    strategy = """
+STRATEGY = """
 Example:
 
 Context:
@@ -21,4 +20,7 @@ Data integration is the process of combining data from multiple sources into a u
 Details:
 It typically involves methods such as ETL, where data is extracted from source systems, transformed into a standardized format, and loaded into a central repository like a data warehouse. Modern data integration platforms may also support real-time pipelines and automation. By integrating data, organizations improve data quality and enable analytics, business intelligence, and informed decision-making.
 """
-    return build_base_prompt(context, question, strategy)
+
+
+def one_shot_prompt(context: str, question: str) -> str:
+    return build_base_prompt(context, question, STRATEGY)
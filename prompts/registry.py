@@ -0,0 +1,18 @@
+from typing import List
+
+from prompts.base import prompt_prefix
+from prompts import zero_shot, one_shot, few_shot, cot
+
+# strategy name -> the instructions/examples it adds to the base prompt
+STRATEGIES = {
+    "base": "",
+    "zero_shot": zero_shot.STRATEGY,
+    "one_shot": one_shot.STRATEGY,
+    "few_shot": few_shot.STRATEGY,
+    "cot": cot.STRATEGY,
+}
+
+
+def static_prefixes() -> List[str]:
+    """The request-independent prompt head of every strategy (see prompt_prefix)."""
+    return [prompt_prefix(strategy) for strategy in STRATEGIES.values()]
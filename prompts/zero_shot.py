@@ -1,7 +1,6 @@
 from prompts.base import build_base_prompt
 
-def zero_shot_prompt(context: str, question: str) -> str:
-    strategy = """
+STRATEGY = """
 Provide the answer in two parts:
 
 Overview:
@@ -15,4 +14,6 @@ Conclusion:
 A concluding sentence or call to action
 """
 
-    return build_base_prompt(context, question, strategy)
\ No newline at end of file
+
+def zero_shot_prompt(context: str, question: str) -> str:
+    return build_base_prompt(context, question, STRATEGY)
@@ -0,0 +1,40 @@
+# retrieval/factory.py
+from core.interfaces import Retriever, Embedder, Index
+from config import RETRIEVAL_MODE, MMR_ENABLED
+
+
+def make_retriever(
+    index: Index,
+    embed_model: Embedder,
+    collection_name: str = "notes",
+    mode: str = RETRIEVAL_MODE,
+    mmr: bool = MMR_ENABLED,
+) -> Retriever:
+    """
+    Builds the Retriever selected by RETRIEVAL_MODE in config.py.
+      "dense"  => StandardRetriever (vector index only)
+      "hybrid" => HybridRetriever (vector index + BM25, reciprocal rank fusion);
+                  the BM25 side reloads after each build and contributes nothing
+                  until build_index has written it
+    With mmr (MMR_ENABLED), the result is wrapped in an MMRRetriever.
+    """
+    retriever = _make_base(index, embed_model, collection_name, mode)
+    if mmr:
+        from retrieval.mmr import MMRRetriever
+        retriever = MMRRetriever(retriever, index, embed_model)
+    return retriever
+
+
+def _make_base(index: Index, embed_model: Embedder, collection_name: str, mode: str) -> Retriever:
+    if mode == "dense":
+        from retrieval.retriever import StandardRetriever
+        return StandardRetriever(index, embed_model)
+    if mode == "hybrid":
+        from index.bm25 import BM25Index
+        from retrieval.hybrid import HybridRetriever
+
+        bm25 = BM25Index(collection_name)
+        if not bm25.count():
+            print(f"No BM25 index for '{collection_name}' yet (run index.build_index); dense results only until then")
+        return HybridRetriever(index, embed_model, bm25)
+    raise ValueError(f"Unknown RETRIEVAL_MODE: {mode!r}")
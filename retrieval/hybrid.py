@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.interfaces import Retriever, Embedder, Index
+from index.bm25 import BM25Index
+from config import HYBRID_CANDIDATES, RRF_K
+
+
+class HybridRetriever(Retriever):
+    """
+    Dense (vector index) + lexical (BM25) retrieval, fused with reciprocal
+    rank fusion: each chunk scores sum(1 / (rrf_k + rank)) over the lists it
+    appears in, so exact terms (course codes, names, formula symbols) that
+    the embedding misses still surface at small top_k.
+
+    Both searches run in parallel. Items keep the StandardRetriever format,
+    with "score" still a distance (lower = better) so the engine's threshold
+    applies unchanged; the fused value is in "rrf".
+    """
+
+    def __init__(
+        self,
+        index: Index,
+        embed_model: Embedder,
+        bm25: BM25Index,
+        candidates: int = HYBRID_CANDIDATES,
+        rrf_k: int = RRF_K,
+    ):
+        self.index = index
+        self.embed_model = embed_model
+        self.bm25 = bm25
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+
+    def _dense(self, queries: List[str], depth: int, filters: Optional[Dict[str, Any]], q_embs=None):
+        if q_embs is None:
+            q_embs = self.embed_model.embed(queries)
+        return q_embs, self.index.query_many(q_embs, depth, filters)
+
+    def _lexical(self, queries: List[str], depth: int, filters: Optional[Dict[str, Any]]):
+        return [self.bm25.search(q, depth, filters) for q in queries]
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        q_embs = None if query_embedding is None else np.asarray(query_embedding).reshape(1, -1)
+        return self.retrieve_many([query], top_k, filters, q_embs)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        One encoder batch + one multi-query dense call for all queries,
+        while the BM25 searches run alongside; then fusion per query.
+        """
+        if not queries:
+            return []
+        queries = list(queries)
+        depth = max(top_k, self.candidates)
+        lexical_f = self._pool.submit(self._lexical, queries, depth, filters)
+        q_embs, dense = self._dense(queries, depth, filters, query_embeddings)
+        lexical = lexical_f.result()
+        return [self._fuse(q, d, l, top_k) for q, d, l in zip(q_embs, dense, lexical)]
+
+    def _fuse(self, q_emb: np.ndarray, dense: List[Dict[str, Any]], lexical, top_k: int) -> List[Dict[str, Any]]:
+        fused: Dict[str, float] = {}
+        for rank, item in enumerate(dense, start=1):
+            fused[item["id"]] = fused.get(item["id"], 0.0) + 1.0 / (self.rrf_k + rank)
+        for rank, (chunk_id, _) in enumerate(lexical, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        top = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+        by_id = {item["id"]: item for item in dense}
+        missing = [chunk_id for chunk_id in top if chunk_id not in by_id]
+        if missing:
+            # Lexical-only hits: fetch text + vector, give them a dense distance too
+            for item in self.index.get(missing):
+                by_id[item["id"]] = {
+                    "text": item["text"],
+                    "metadata": item["metadata"],
+                    "id": item["id"],
+                    "score": self._distance(q_emb, item["embedding"]),
+                }
+
+        results = []
+        for chunk_id in top:
+            if chunk_id in by_id:  # BM25 can briefly lag a concurrent delete
+                results.append({**by_id[chunk_id], "rrf": fused[chunk_id]})
+        return results
+
+    @staticmethod
+    def _distance(q_emb: np.ndarray, emb: np.ndarray) -> float:
+        # Squared L2, as Chroma reports it; equals FlatIndex's 2 - 2cos for unit vectors
+        diff = np.asarray(emb, dtype=np.float32) - q_emb
+        return float(diff @ diff)
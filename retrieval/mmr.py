@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.interfaces import Retriever, Embedder, Index
+from core.vectors import as_matrix, as_vector
+from config import MMR_FETCH_K, MMR_LAMBDA
+
+
+def mmr_select(query_vec: np.ndarray, cand_vecs: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Maximal marginal relevance over a candidate set, as matrix operations.
+
+    Picks k rows greedily by  lambda * sim(query, c) - (1 - lambda) * max sim(c, picked).
+    The candidate-candidate cosine matrix is computed once; "max sim to the
+    picked set" is a running vector updated with one np.maximum per step.
+    """
+    n = len(cand_vecs)
+    if n == 0 or k <= 0:
+        return []
+    c = cand_vecs / np.clip(np.linalg.norm(cand_vecs, axis=1, keepdims=True), 1e-12, None)
+    q = query_vec / max(float(np.linalg.norm(query_vec)), 1e-12)
+
+    relevance = c @ q          # (n,)
+    pairwise = c @ c.T         # (n, n)
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    picked: List[int] = []
+    for _ in range(min(k, n)):
+        if picked:
+            score = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        else:
+            score = relevance.copy()
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return picked
+
+
+class MMRRetriever(Retriever):
+    """
+    Diversifies another retriever's results: over-fetches `fetch_k`
+    candidates, pulls their stored vectors with Index.get, and keeps the
+    top_k chosen by MMR, so near-duplicate neighbours (adjacent chunks of
+    one page) do not fill the prompt. Items keep the wrapped format.
+    """
+
+    def __init__(
+        self,
+        base: Retriever,
+        index: Index,
+        embed_model: Embedder,
+        fetch_k: int = MMR_FETCH_K,
+        lambda_mult: float = MMR_LAMBDA,
+    ):
+        self.base = base
+        self.index = index
+        self.embed_model = embed_model
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        q_embs = None if query_embedding is None else as_matrix(query_embedding)
+        return self.retrieve_many([query], top_k, filters, q_embs)[0]
+
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        if not queries:
+            return []
+        queries = list(queries)
+        if query_embeddings is None:
+            query_embeddings = self.embed_model.embed(queries)
+        # The base retriever reuses the vectors instead of encoding the queries again
+        batches = self.base.retrieve_many(queries, max(top_k, self.fetch_k), filters, query_embeddings)
+        q_embs = query_embeddings
+        # One Index.get for every candidate of every query
+        wanted = list(dict.fromkeys(c["id"] for candidates in batches for c in candidates))
+        stored = {item["id"]: item["embedding"] for item in self.index.get(wanted)} if wanted else {}
+
+        results = []
+        for q_emb, candidates in zip(q_embs, batches):
+            candidates = [c for c in candidates if c["id"] in stored]
+            if len(candidates) <= 1:
+                results.append(candidates[:top_k])
+                continue
+            vecs = as_matrix(np.stack([stored[c["id"]] for c in candidates]))
+            picked = mmr_select(as_vector(q_emb), vecs, top_k, self.lambda_mult)
+            results.append([candidates[i] for i in picked])
+        return results
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+from sentence_transformers import CrossEncoder
+
+from core.hashing import stable_id
+from config import RERANK_MODEL_NAME, RERANK_BATCH_SIZE, RERANK_CACHE_ITEMS
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieved chunks by a cross-encoder's (query, chunk) relevance.
+
+    All uncached pairs for a query go through the model in one batched
+    forward pass. Pair scores are kept in a bounded LRU keyed by
+    (query, chunk text), so repeated questions cost no forward pass.
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL_NAME,
+        batch_size: int = RERANK_BATCH_SIZE,
+        cache_items: int = RERANK_CACHE_ITEMS,
+    ):
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+        self.cache_items = cache_items
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        keys = [stable_id(query, t) for t in texts]
+        scores = np.empty(len(texts), dtype=np.float32)
+        todo: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                s = self._cache.get(k)
+                if s is None:
+                    todo.setdefault(k, []).append(i)
+                else:
+                    self._cache.move_to_end(k)
+                    scores[i] = s
+            self.hits += len(keys) - sum(len(v) for v in todo.values())
+            self.misses += len(todo)
+
+        if todo:
+            first = [positions[0] for positions in todo.values()]
+            fresh = self.model.predict(
+                [(query, texts[i]) for i in first],
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            with self._lock:
+                for (k, positions), s in zip(todo.items(), fresh.tolist()):
+                    scores[positions] = s
+                    self._cache[k] = s
+                while len(self._cache) > self.cache_items:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, items: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Best `top_k` of `items` by cross-encoder score (higher = more relevant),
+        each with an added "rerank_score".
+        """
+        if not items:
+            return []
+        scores = self.score(query, [item["text"] for item in items])
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [{**items[i], "rerank_score": float(scores[i])} for i in order]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
@@ -1,40 +1,39 @@
-from typing import List, Dict, Any
-from core.interfaces import Retriever, Embedder
-import chromadb
+from typing import List, Dict, Any, Optional
+from core.interfaces import Retriever, Embedder, Index
+import numpy as np
 
 class StandardRetriever(Retriever):
-    def __init__(self, collection: chromadb.Collection, embed_model: Embedder):
-        self.collection = collection
+    def __init__(self, index: Index, embed_model: Embedder):
+        # Any Index backend: ChromaIndex, FlatIndex, ...
+        self.index = index
         self.embed_model = embed_model
 
-    def _embed_query(self, q: str) -> List[float]:
-        # Interface returns List[List[float]]
+    def _embed_query(self, q: str) -> np.ndarray:
+        # Interface returns a (1, dim) float32 array
         return self.embed_model.embed([q])[0]
 
-    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        q_emb = self._embed_query(query)
-        results = self.collection.query(
-            query_embeddings=[q_emb],
-            n_results=top_k,
-        )
-        
-        # Check if we got results
-        if not results["documents"] or not results["documents"][0]:
-            return []
-
-        docs = results["documents"][0]
-        metas = results["metadatas"][0]
-        ids = results["ids"][0]
-        distances = results["distances"][0]
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        q_emb = self._embed_query(query) if query_embedding is None else query_embedding
+        # Items: {"text", "metadata", "id", "score"}; score is a distance (lower = better match)
+        return self.index.query(q_emb, top_k, filters)
 
-        retrieved_items = []
-        for i in range(len(docs)):
-            item = {
-                "text": docs[i],
-                "metadata": metas[i],
-                "id": ids[i],
-                "score": distances[i] # In Chroma, lower distance = better match usually
-            }
-            retrieved_items.append(item)
-            
-        return retrieved_items
+    def retrieve_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        One encoder batch for all queries, then one multi-query index call.
+        """
+        if not queries:
+            return []
+        q_embs = self.embed_model.embed(list(queries)) if query_embeddings is None else query_embeddings
+        return self.index.query_many(q_embs, top_k, filters)
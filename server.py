@@ -1,12 +1,47 @@
-from flask import Flask, request, jsonify
+import json
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import chromadb
 
-from embeddings.embedder import HuggingFaceEmbedder
-from retrieval.retriever import StandardRetriever
+from embeddings.factory import make_embedder
+from embeddings.batching import MicroBatchingEmbedder
+from index.factory import open_index
+from retrieval.factory import make_retriever
 from generation.llm_wrapper import Llama32Local
+from generation.batching import BatchingGenerator
 from pipeline.engine import RAGEngine
-from config import CHROMA_DIR, EMBED_MODEL_NAME
+from pipeline.answer_cache import SemanticAnswerCache
+from pipeline.exact_cache import ExactCache
+from pipeline.context_packer import ContextPacker
+from pipeline.compressor import ExtractiveCompressor
+from generation.tokens import TokenCounter
+from index.version import IndexVersion
+from core.filters import normalize_filters
+from config import (
+    INDEX_BACKEND,
+    INDEX_SHARDS,
+    RETRIEVAL_MODE,
+    EMBED_MODEL_NAME,
+    QUERY_BATCH_MAX_SIZE,
+    QUERY_BATCH_MAX_WAIT_MS,
+    GEN_BATCH_ENABLED,
+    GEN_BATCH_MAX_SIZE,
+    GEN_BATCH_MAX_WAIT_MS,
+    RERANK_ENABLED,
+    RERANK_MODEL_NAME,
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_THRESHOLD,
+    EXACT_CACHE_ENABLED,
+    EXACT_CACHE_PATH,
+    CONTEXT_PACKING_ENABLED,
+    PROMPT_TOKEN_BUDGET,
+    COMPRESSION_ENABLED,
+    COMPRESS_TOP_SENTENCES,
+    COMPRESS_NEIGHBOURS,
+    TOP_K,
+    MAX_TOP_K,
+    MAX_RERANK_DEPTH,
+)
 
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests (needed if UI runs on different port)
@@ -23,24 +58,78 @@ def get_engine():
 
     # 1. Embedding model
     print(f"  → Embedding Model: {EMBED_MODEL_NAME}")
-    embed_model = HuggingFaceEmbedder(model_name=EMBED_MODEL_NAME)
-
-    # 2. ChromaDB
-    print(f"  → ChromaDB: {CHROMA_DIR}")
-    chroma_client = chromadb.PersistentClient(path=str(CHROMA_DIR))
-    collection = chroma_client.get_collection("notes")
+    embed_model = make_embedder(model_name=EMBED_MODEL_NAME)
+    # Concurrent /query requests share one encoder forward pass
+    print(f"  → Query micro-batching: max {QUERY_BATCH_MAX_SIZE}, wait {QUERY_BATCH_MAX_WAIT_MS} ms")
+    embed_model = MicroBatchingEmbedder(
+        embed_model,
+        max_batch=QUERY_BATCH_MAX_SIZE,
+        max_wait_ms=QUERY_BATCH_MAX_WAIT_MS,
+    )
+
+    # 2. Vector index
+    print(f"  → Index: {INDEX_BACKEND}" + (f" x {INDEX_SHARDS} shards" if INDEX_SHARDS > 1 else ""))
+    index = open_index("notes")
 
     # 3. Retriever
-    print("  → Building Retriever...")
-    retriever = StandardRetriever(collection, embed_model)
+    print(f"  → Building Retriever ({RETRIEVAL_MODE})...")
+    retriever = make_retriever(index, embed_model)
+
+    # 3b. Optional cross-encoder rerank stage
+    reranker = None
+    if RERANK_ENABLED:
+        from retrieval.rerank import CrossEncoderReranker
+        print(f"  → Reranker: {RERANK_MODEL_NAME}")
+        reranker = CrossEncoderReranker()
+
+    # 3c. Answer caches: identical requests, then paraphrased questions
+    #     (both invalidated by the index version build_index bumps)
+    index_version = IndexVersion("notes")
+    exact_cache = None
+    if EXACT_CACHE_ENABLED:
+        print(f"  → Exact cache: {EXACT_CACHE_PATH or 'memory only'}")
+        exact_cache = ExactCache(index_version, path=EXACT_CACHE_PATH)
+    answer_cache = None
+    if ANSWER_CACHE_ENABLED:
+        print(f"  → Answer cache: cosine >= {ANSWER_CACHE_THRESHOLD}")
+        answer_cache = SemanticAnswerCache(embed_model, index_version)
 
     # 4. Generator (LLM)
     print("  → Loading LLM...")
     generator = Llama32Local()
+    if GEN_BATCH_ENABLED:
+        # Concurrent /query requests share one left-padded generate call
+        print(f"  → Generation batching: max {GEN_BATCH_MAX_SIZE}, wait {GEN_BATCH_MAX_WAIT_MS} ms")
+        generator = BatchingGenerator(
+            generator,
+            max_batch=GEN_BATCH_MAX_SIZE,
+            max_wait_ms=GEN_BATCH_MAX_WAIT_MS,
+        )
+
+    # 4b. Extractive compression of retrieved chunks (sentence vectors come
+    #     from the embedding cache filled at ingest)
+    compressor = None
+    if COMPRESSION_ENABLED:
+        print(f"  → Compression: top {COMPRESS_TOP_SENTENCES} sentences ± {COMPRESS_NEIGHBOURS} per chunk")
+        compressor = ExtractiveCompressor(embed_model)
+
+    # 4c. Prompt packing to a token budget (tokenizer only)
+    packer = None
+    if CONTEXT_PACKING_ENABLED:
+        print(f"  → Context packing: {PROMPT_TOKEN_BUDGET} prompt tokens")
+        packer = ContextPacker(TokenCounter())
 
     # 5. Assemble engine
     print("  → Assembling Engine...")
-    rag_engine = RAGEngine(retriever=retriever, generator=generator)
+    rag_engine = RAGEngine(
+        retriever=retriever,
+        generator=generator,
+        reranker=reranker,
+        answer_cache=answer_cache,
+        exact_cache=exact_cache,
+        packer=packer,
+        compressor=compressor,
+    )
     print("═══ RAG Engine Ready ═══\n")
     return rag_engine
 
@@ -52,27 +141,104 @@ def health():
     return jsonify({"status": "running"})
 
 
-@app.route("/query", methods=["POST"])
-def query():
-    data = request.json
-    question = data.get("question", "").strip()
+@app.route("/stats", methods=["GET"])
+def stats():
+    engine = get_engine()
+    out = {}
+    if engine.exact_cache is not None:
+        out["exact_cache"] = engine.exact_cache.stats()
+    if engine.answer_cache is not None:
+        out["answer_cache"] = engine.answer_cache.stats()
+    if engine.reranker is not None:
+        out["reranker"] = engine.reranker.stats()
+    embedder = getattr(engine.retriever, "embed_model", None)
+    if hasattr(embedder, "stats"):
+        out["query_batching"] = embedder.stats()
+    if hasattr(engine.generator, "stats"):
+        out["generation_batching"] = engine.generator.stats()
+    llm = getattr(engine.generator, "inner", engine.generator)
+    if getattr(llm, "prefix_cache", None) is not None:
+        out["prefix_cache"] = llm.prefix_cache.stats()
+    return jsonify(out)
+
+
+def _parse_query(data):
+    """(kwargs for engine.answer*, None) or (None, error response)."""
+    question = (data or {}).get("question", "").strip()
 
     if not question:
-        return jsonify({"error": "Missing 'question' field"}), 400
+        return None, (jsonify({"error": "Missing 'question' field"}), 400)
+
+    # Optional per-request retrieval knobs
+    try:
+        top_k = int(data.get("top_k", TOP_K))
+        rerank_depth = data.get("rerank_depth")
+        rerank_depth = int(rerank_depth) if rerank_depth is not None else None
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "'top_k' and 'rerank_depth' must be integers"}), 400)
+    if top_k < 1 or (rerank_depth is not None and rerank_depth < 1):
+        return None, (jsonify({"error": "'top_k' and 'rerank_depth' must be positive"}), 400)
+    if top_k > MAX_TOP_K:
+        return None, (jsonify({"error": f"'top_k' must be at most {MAX_TOP_K}"}), 400)
+    if rerank_depth is not None and rerank_depth > MAX_RERANK_DEPTH:
+        return None, (jsonify({"error": f"'rerank_depth' must be at most {MAX_RERANK_DEPTH}"}), 400)
+
+    # e.g. {"filename": "OB Unit-2.pdf", "file_type": "pdf", "page_range": [3, 10]}
+    try:
+        filters = normalize_filters(data.get("filters"))
+    except (TypeError, ValueError) as e:
+        return None, (jsonify({"error": f"Invalid 'filters': {e}"}), 400)
+
+    return dict(question=question, top_k=top_k, rerank_depth=rerank_depth, filters=filters), None
+
+
+@app.route("/query", methods=["POST"])
+def query():
+    args, error = _parse_query(request.json)
+    if error is not None:
+        return error
 
     engine = get_engine()
 
     try:
-        result = engine.answer(question)
+        result = engine.answer(**args)
         return jsonify(result)
     except Exception as e:
         print(f"[ERROR] {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/query/stream", methods=["POST"])
+def query_stream():
+    """
+    Same request body as /query; the response is Server-Sent Events, one
+    `data: <json>` per engine.answer_stream event (sources, token..., done),
+    so the client can show citations and the first words right away.
+    """
+    args, error = _parse_query(request.json)
+    if error is not None:
+        return error
+
+    engine = get_engine()
+
+    def events():
+        try:
+            for event in engine.answer_stream(**args):
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            print(f"[ERROR] {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Main ───────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
     get_engine()                       # warm-up on startup
     print("Starting RAG API  →  http://localhost:5000")
-    app.run(host="0.0.0.0", port=5000)
+    app.run(host="0.0.0.0", port=5000, threaded=True)
@@ -7,6 +7,8 @@ Run:
   Terminal 2:  python ui.py
 """
 
+import json
+
 import gradio as gr
 import requests
 
@@ -14,50 +16,74 @@ API_URL = "http://localhost:5000"
 
 
 # ── Chat callback ──────────────────────────────────────────────────
+def format_sources(sources):
+    """Markdown citation block appended under the answer."""
+    if not sources:
+        return ""
+    out = "\n\n---\n📚 **Sources:**\n"
+    for i, s in enumerate(sources, 1):
+        fname = s.get("filename", "?")
+        page = s.get("page_num")
+        slide = s.get("slide_num")
+        loc = f"Page {page}" if page else (f"Slide {slide}" if slide else "")
+        out += f"{i}. *{fname}*"
+        if loc:
+            out += f" ({loc})"
+        out += "\n"
+    return out
+
+
 def respond(message, history):
     """
     message : str               — user's latest message
     history : list[list[str]]   — [[user_msg, bot_msg], ...]
+
+    Streams from /query/stream: yields the growing answer as tokens arrive
+    (Gradio re-renders the bot bubble on each yield), sources at the end.
     """
     if not message.strip():
-        return "Please type a question."
+        yield "Please type a question."
+        return
 
     try:
         resp = requests.post(
-            f"{API_URL}/query",
+            f"{API_URL}/query/stream",
             json={"question": message},
             timeout=300,
+            stream=True,
         )
 
         if resp.status_code != 200:
-            return f"⚠️ Server error ({resp.status_code})"
-
-        data = resp.json()
-        answer = data.get("answer", "No answer.")
-        sources = data.get("sources", [])
-
-        # Append source citations
-        if sources:
-            answer += "\n\n---\n📚 **Sources:**\n"
-            for i, s in enumerate(sources, 1):
-                fname = s.get("filename", "?")
-                page = s.get("page_num")
-                slide = s.get("slide_num")
-                loc = f"Page {page}" if page else (f"Slide {slide}" if slide else "")
-                answer += f"{i}. *{fname}*"
-                if loc:
-                    answer += f" ({loc})"
-                answer += "\n"
-
-        return answer
+            yield f"⚠️ Server error ({resp.status_code})"
+            return
+
+        answer, sources = "", []
+        with resp:
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue  # blank separators between events
+                event = json.loads(line[len("data:"):])
+                kind = event.get("type")
+                if kind == "sources":
+                    sources = event.get("sources", [])
+                elif kind == "token":
+                    answer += event["text"]
+                    yield answer
+                elif kind == "done":
+                    answer = event.get("answer") or answer
+                elif kind == "error":
+                    yield f"❌ Error: {event.get('error')}"
+                    return
+
+        yield (answer or "No answer.") + format_sources(sources)
 
     except requests.exceptions.ConnectionError:
-        return (
+        yield (
             "❌ **Cannot reach the server.**\n\n"
             "Run `python server.py` in another terminal first."
         )
     except Exception as e:
-        return f"❌ Error: {e}"
+        yield f"❌ Error: {e}"
 
 
 # ── Custom CSS ─────────────────────────────────────────────────────